@@ -0,0 +1,162 @@
+import time
+from asyncio import Lock
+from pathlib import Path
+
+import aiosqlite
+
+from src.common.interfaces.destroyable import IAsyncDestroyable
+from src.common.interfaces.runnable import IAsyncRunnable
+from src.common.logger.logger_mixin import LoggerMixin
+
+# После вытеснения кэш занимает не больше этой доли лимита, чтобы не вытеснять на каждой записи
+_EVICTION_LOW_WATERMARK = 0.9
+
+
+class SqliteCache(LoggerMixin, IAsyncRunnable, IAsyncDestroyable):
+    """Дисковый key-value кэш в SQLite с ограничением размера и LRU-вытеснением"""
+
+    __path: Path
+    __max_size_bytes: int
+    __connection: aiosqlite.Connection | None
+    __size_bytes: int
+    __lock: Lock
+
+    def __init__(self, path: Path, max_size_bytes: int) -> None:
+        self.__path = path
+        self.__max_size_bytes = max_size_bytes
+        self.__connection = None
+        self.__size_bytes = 0
+        self.__lock = Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__size_bytes
+
+    async def run(self) -> None:
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+
+        connection = await aiosqlite.connect(self.__path)
+        await connection.execute("PRAGMA journal_mode=WAL")
+        await connection.execute("PRAGMA synchronous=NORMAL")
+        await connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        await connection.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_accessed_at "
+            "ON cache_entries (accessed_at)"
+        )
+        await connection.commit()
+
+        async with connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries"
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        self.__connection = connection
+        self.__size_bytes = int(row[0]) if row is not None else 0
+
+        self._logger.info(
+            f"Initialization complete, cache '{self.__path}' holds {self.__size_bytes} bytes"
+        )
+
+    async def destroy(self) -> None:
+        if self.__connection is None:
+            return
+
+        await self.__connection.close()
+        self.__connection = None
+
+    async def get(self, key: str) -> bytes | None:
+        connection = self.__get_connection()
+
+        async with connection.execute(
+            "SELECT value FROM cache_entries WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        if row is None:
+            return None
+
+        async with self.__lock:
+            await connection.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            await connection.commit()
+
+        return bytes(row[0])
+
+    async def set(self, key: str, value: bytes) -> None:
+        connection = self.__get_connection()
+        size = len(value)
+
+        if size > self.__max_size_bytes:
+            self._logger.debug(f"Skip caching '{key}': {size} bytes exceed cache limit")
+            return
+
+        async with self.__lock:
+            async with connection.execute(
+                "SELECT size FROM cache_entries WHERE key = ?", (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+
+            await connection.execute(
+                "INSERT INTO cache_entries (key, value, size, accessed_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = excluded.value, size = excluded.size, accessed_at = excluded.accessed_at",
+                (key, value, size, time.time()),
+            )
+            self.__size_bytes += size - (int(row[0]) if row is not None else 0)
+
+            if self.__size_bytes > self.__max_size_bytes:
+                await self.__evict(connection)
+
+            await connection.commit()
+
+    async def delete(self, key: str) -> None:
+        connection = self.__get_connection()
+
+        async with self.__lock:
+            async with connection.execute(
+                "DELETE FROM cache_entries WHERE key = ? RETURNING size", (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+
+            if row is not None:
+                self.__size_bytes -= int(row[0])
+
+            await connection.commit()
+
+    async def __evict(self, connection: aiosqlite.Connection) -> None:
+        target_size = int(self.__max_size_bytes * _EVICTION_LOW_WATERMARK)
+        evicted_keys: list[str] = []
+
+        async with connection.execute(
+            "SELECT key, size FROM cache_entries ORDER BY accessed_at ASC"
+        ) as cursor:
+            async for key, size in cursor:
+                if self.__size_bytes <= target_size:
+                    break
+
+                evicted_keys.append(key)
+                self.__size_bytes -= int(size)
+
+        await connection.executemany(
+            "DELETE FROM cache_entries WHERE key = ?",
+            [(key,) for key in evicted_keys],
+        )
+
+        self._logger.debug(
+            f"Evicted {len(evicted_keys)} entries, cache holds {self.__size_bytes} bytes"
+        )
+
+    def __get_connection(self) -> aiosqlite.Connection:
+        if self.__connection is None:
+            raise RuntimeError("Cache not initialized")
+
+        return self.__connection
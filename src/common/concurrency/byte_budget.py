@@ -0,0 +1,36 @@
+from asyncio import Condition
+
+
+class ByteBudget:
+    """
+    Ограничитель объёма данных в памяти: `acquire` ждёт, пока занятый объём с учётом запроса не уложится в `limit`.
+    Запрос больше лимита выдаётся, когда бюджет свободен целиком, чтобы не ждать вечно.
+    """
+
+    __limit: int
+    __used: int
+    __condition: Condition
+
+    def __init__(self, limit: int) -> None:
+        if limit <= 0:
+            raise ValueError("Byte budget limit must be positive")
+
+        self.__limit = limit
+        self.__used = 0
+        self.__condition = Condition()
+
+    @property
+    def used(self) -> int:
+        return self.__used
+
+    async def acquire(self, size: int) -> None:
+        async with self.__condition:
+            await self.__condition.wait_for(
+                lambda: self.__used == 0 or self.__used + size <= self.__limit
+            )
+            self.__used += size
+
+    async def release(self, size: int) -> None:
+        async with self.__condition:
+            self.__used = max(0, self.__used - size)
+            self.__condition.notify_all()
@@ -0,0 +1,95 @@
+from asyncio import Future, Queue, Task, create_task, gather, get_running_loop
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, Self
+
+from src.common.logger.logger_mixin import LoggerMixin
+
+type _QueueItem = tuple[Any, Future[Any]] | None
+
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int
+
+
+class StagedExecutor(LoggerMixin):
+    """
+    Конвейер стадий с ограниченными очередями между ними и собственным параллелизмом каждой стадии.
+    Элемент, отправленный через submit, проходит стадии по порядку: результат стадии - вход следующей,
+    None завершает обработку элемента досрочно. submit возвращает результат последней стадии
+    или пробрасывает исключение стадии, на которой обработка элемента упала.
+    Заполненная очередь останавливает предыдущую стадию, так что число элементов между стадиями ограничено.
+    """
+
+    __stages: list[Stage]
+    __queues: list[Queue[_QueueItem]]
+    __workers: list[list[Task[None]]]
+
+    def __init__(self, stages: list[Stage], queue_size: int) -> None:
+        self.__stages = stages
+        self.__queues = [Queue(maxsize=queue_size) for _ in stages]
+        self.__workers = []
+
+    async def __aenter__(self) -> Self:
+        self.__workers = [
+            [create_task(self.__work(index)) for _ in range(stage.concurrency)]
+            for index, stage in enumerate(self.__stages)
+        ]
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc is not None:
+            for workers in self.__workers:
+                for worker in workers:
+                    worker.cancel()
+
+            await gather(*(worker for workers in self.__workers for worker in workers), return_exceptions=True)
+            return
+
+        # Стадии закрываются по очереди: в очередь следующей стадии больше ничего не попадёт
+        for queue, workers in zip(self.__queues, self.__workers):
+            for _ in workers:
+                await queue.put(None)
+
+            await gather(*workers)
+
+    async def submit(self, item: Any) -> Any:
+        future: Future[Any] = get_running_loop().create_future()
+        await self.__queues[0].put((item, future))
+
+        return await future
+
+    async def __work(self, index: int) -> None:
+        stage = self.__stages[index]
+        queue = self.__queues[index]
+        is_last = index == len(self.__stages) - 1
+
+        while (queued := await queue.get()) is not None:
+            item, future = queued
+
+            if future.done():
+                continue
+
+            try:
+                result = await stage.handler(item)
+            except Exception as error:
+                self._logger.debug(f"Stage '{stage.name}' failed: {error}")
+                if not future.done():
+                    future.set_exception(error)
+                continue
+
+            if is_last or result is None:
+                if not future.done():
+                    future.set_result(result)
+                continue
+
+            await self.__queues[index + 1].put((result, future))
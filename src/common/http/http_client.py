@@ -0,0 +1,78 @@
+from typing import Any
+
+import aiohttp
+import orjson
+
+from src.common.interfaces.destroyable import IAsyncDestroyable
+from src.common.interfaces.runnable import IAsyncRunnable
+from src.common.logger.logger_mixin import LoggerMixin
+
+
+class HttpClient(LoggerMixin, IAsyncRunnable, IAsyncDestroyable):
+    """
+    Общий на весь процесс HTTP-клиент: одно пулированное соединение на хост переиспользуется
+    всеми запросами, поэтому установка TCP/TLS-соединений и DNS-запросы не повторяются на каждом запуске
+    """
+
+    __limit: int
+    __limit_per_host: int
+    __keepalive_timeout: float
+    __ttl_dns_cache: int
+    __timeout: aiohttp.ClientTimeout
+    __session: aiohttp.ClientSession | None
+
+    def __init__(
+        self,
+        *,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+        ttl_dns_cache: int,
+        total_timeout: float,
+        connect_timeout: float,
+        sock_read_timeout: float,
+    ) -> None:
+        self.__limit = limit
+        self.__limit_per_host = limit_per_host
+        self.__keepalive_timeout = keepalive_timeout
+        self.__ttl_dns_cache = ttl_dns_cache
+        self.__timeout = aiohttp.ClientTimeout(
+            total=total_timeout, connect=connect_timeout, sock_read=sock_read_timeout
+        )
+        self.__session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self.__session is None:
+            raise RuntimeError("HTTP client not initialized")
+
+        return self.__session
+
+    async def run(self) -> None:
+        connector = aiohttp.TCPConnector(
+            limit=self.__limit,
+            limit_per_host=self.__limit_per_host,
+            keepalive_timeout=self.__keepalive_timeout,
+            ttl_dns_cache=self.__ttl_dns_cache,
+            use_dns_cache=True,
+        )
+        self.__session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.__timeout,
+            json_serialize=lambda value: orjson.dumps(value).decode(),
+        )
+
+        self._logger.info(
+            f"Initialization complete, limit={self.__limit}, limit_per_host={self.__limit_per_host}"
+        )
+
+    async def destroy(self) -> None:
+        if self.__session is None:
+            return
+
+        await self.__session.close()
+        self.__session = None
+
+    # noinspection PyMethodMayBeStatic
+    async def read_json(self, response: aiohttp.ClientResponse) -> Any:
+        return orjson.loads(await response.read())
@@ -0,0 +1,80 @@
+import time
+from asyncio import Condition
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Ограничитель числа одновременных запросов с AIMD-регулировкой:
+    успешные быстрые ответы увеличивают лимит на единицу за «окно» лимита,
+    ошибки перегрузки и медленные ответы уменьшают его мультипликативно.
+    """
+
+    __limit: float
+    __min_limit: int
+    __max_limit: int
+    __latency_target: float
+    __decrease_factor: float
+    __decrease_cooldown: float
+    __last_decrease_at: float
+    __in_flight: int
+    __condition: Condition
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+
+        self.__limit = float(initial_limit)
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__latency_target = latency_target
+        self.__decrease_factor = decrease_factor
+        self.__decrease_cooldown = decrease_cooldown
+        self.__last_decrease_at = 0.0
+        self.__in_flight = 0
+        self.__condition = Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    async def acquire(self) -> None:
+        async with self.__condition:
+            await self.__condition.wait_for(lambda: self.__in_flight < int(self.__limit))
+            self.__in_flight += 1
+
+    async def release(self, *, latency: float, overloaded: bool) -> None:
+        async with self.__condition:
+            self.__in_flight -= 1
+
+            if overloaded or latency > self.__latency_target:
+                self.__decrease()
+            else:
+                self.__limit = min(
+                    float(self.__max_limit), self.__limit + 1.0 / self.__limit
+                )
+
+            self.__condition.notify_all()
+
+    def __decrease(self) -> None:
+        # Одна волна ошибок от уже отправленных запросов должна уменьшать лимит один раз
+        now = time.monotonic()
+        if now - self.__last_decrease_at < self.__decrease_cooldown:
+            return
+
+        self.__last_decrease_at = now
+        self.__limit = max(
+            float(self.__min_limit), self.__limit * self.__decrease_factor
+        )
@@ -0,0 +1,62 @@
+import time
+from asyncio import Lock, sleep
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов: `rate` токенов в секунду с запасом `capacity`"""
+
+    __rate: float
+    __capacity: float
+    __tokens: float
+    __updated_at: float
+    __paused_until: float
+    __lock: Lock
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive")
+
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__tokens = capacity
+        self.__updated_at = time.monotonic()
+        self.__paused_until = 0.0
+        self.__lock = Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Дождаться токенов, возвращает время ожидания в секундах"""
+
+        waited = 0.0
+
+        async with self.__lock:
+            while True:
+                now = time.monotonic()
+
+                if now < self.__paused_until:
+                    delay = self.__paused_until - now
+                else:
+                    self.__refill(now)
+
+                    if self.__tokens >= tokens:
+                        self.__tokens -= tokens
+                        return waited
+
+                    delay = (tokens - self.__tokens) / self.__rate
+
+                await sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить выдачу токенов (например, по заголовку Retry-After)"""
+
+        self.__paused_until = max(self.__paused_until, time.monotonic() + seconds)
+        self.__tokens = 0.0
+        # Пауза не копит токены: пополнение начнётся с её окончания, а не с полного запаса
+        self.__updated_at = max(self.__updated_at, self.__paused_until)
+
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(
+            self.__capacity,
+            self.__tokens + (now - self.__updated_at) * self.__rate,
+        )
+        self.__updated_at = now
@@ -1,9 +1,17 @@
 from asyncio import Future
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.components.cache.registry_response_cache import (
+    RegistryResponseCache,
+)
 from src.documentation_processing.components.database.mongo.mongo_database import (
     MongoDatabase,
 )
+from src.documentation_processing.components.http.http_client import HttpClient
+from src.documentation_processing.components.kdctl.kdctl_runner import KdctlRunner
+from src.documentation_processing.components.kdctl.kdctl_worker_pool import (
+    KdctlWorkerPool,
+)
 from src.documentation_processing.settings import Settings
 from src.documentation_processing.workers.workers import Workers
 from src.documentation_processing.di_tag import DI_TAG
@@ -15,15 +23,28 @@ class Application(LoggerMixin):
         self,
         settings: Settings,
         mongo_database: MongoDatabase,
+        http_client: HttpClient,
+        registry_response_cache: RegistryResponseCache,
+        kdctl_runner: KdctlRunner,
+        kdctl_worker_pool: KdctlWorkerPool,
         workers: Workers,
     ) -> None:
         self.__settings = settings
         self.__mongo_database = mongo_database
+        self.__http_client = http_client
+        self.__registry_response_cache = registry_response_cache
+        self.__kdctl_runner = kdctl_runner
+        self.__kdctl_worker_pool = kdctl_worker_pool
         self.__workers = workers
 
     async def run(self) -> None:
         self._logger.info("Starting %s", self.__settings.app.app_name)
         await self.__mongo_database.run()
+        await self.__http_client.run()
+        if self.__settings.registry.cache_enabled:
+            await self.__registry_response_cache.run()
+        if self.__settings.processing.kdctl_mode == "worker_pool":
+            await self.__kdctl_worker_pool.run()
         self.__workers.run()
 
         await Future()
@@ -31,4 +52,8 @@ class Application(LoggerMixin):
     async def shutdown(self) -> None:
         self._logger.info("Shutting down %s", self.__settings.app.app_name)
         self.__workers.stop()
+        await self.__kdctl_runner.destroy()
+        await self.__kdctl_worker_pool.destroy()
+        await self.__registry_response_cache.destroy()
+        await self.__http_client.destroy()
         await self.__mongo_database.destroy()
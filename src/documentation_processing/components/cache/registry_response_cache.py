@@ -0,0 +1,18 @@
+from dependency_injector.wiring import Provide
+
+from src.common.cache.sqlite_cache import SqliteCache
+from src.common.dependency_injection.injectable import injectable
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import RegistrySettings
+
+
+@injectable(container_tags=[DI_TAG])
+class RegistryResponseCache(SqliteCache):
+    def __init__(
+        self,
+        registry_config: RegistrySettings = Provide["settings.provided.registry"],
+    ) -> None:
+        super().__init__(
+            path=registry_config.cache_path,
+            max_size_bytes=registry_config.cache_max_size_bytes,
+        )
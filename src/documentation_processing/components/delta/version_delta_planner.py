@@ -0,0 +1,253 @@
+import traceback
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, cast
+from uuid import uuid4
+
+import aiofiles.os
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.common.utils.fs_utils import load_json_from_file, save_json_to_file
+from src.documentation_processing.components.storage.page_store import (
+    PageManifestEntry,
+)
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.models.document import ProviderVersionDocument
+from src.documentation_processing.models.internal import ProviderVersion
+from src.documentation_processing.settings import Settings
+from src.kdctl.types.document import Document, VectorShardRow
+from src.kdctl.utils.documents import list_document_files
+from src.kdctl.utils.vector_shards import (
+    list_vector_shards,
+    load_vector_shard,
+    load_vector_shard_rows,
+    save_vector_shard,
+)
+
+
+@dataclass(frozen=True)
+class VectorizedChunk:
+    """Чанк векторизованной версии: JSON-документ или строка `row` шарда векторов `path`"""
+
+    path: Path
+    pages: frozenset[str]
+    row: int | None = None
+
+
+@dataclass
+class VersionDeltaPlan:
+    pages_to_prepare: list[PageManifestEntry]
+    base_version: str | None = None
+    carried_chunks: list[VectorizedChunk] = field(default_factory=list)
+
+    @property
+    def is_delta(self) -> bool:
+        return self.base_version is not None
+
+
+@injectable(container_tags=[DI_TAG])
+class VersionDeltaPlanner(LoggerMixin):
+    """
+    Сравнивает страницы новой версии с последней обработанной версией провайдера по хэшам.
+    Чанки предыдущей версии переносятся, если все страницы, из которых они получены, не изменились,
+    а подготовке и векторизации подлежат только остальные страницы.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.__settings = settings
+
+    async def plan(
+        self,
+        *,
+        version: ProviderVersion,
+        pages: list[PageManifestEntry],
+        workspace_root: Path,
+    ) -> VersionDeltaPlan:
+        full_plan = VersionDeltaPlan(pages_to_prepare=pages)
+
+        if not self.__settings.processing.delta_enabled:
+            return full_plan
+
+        previous = (
+            await ProviderVersionDocument.find(
+                ProviderVersionDocument.namespace == version.provider.namespace,
+                ProviderVersionDocument.name == version.provider.name,
+                ProviderVersionDocument.version != version.version,
+                {"pages.0": {"$exists": True}},
+            )
+            .sort(-ProviderVersionDocument.processed_at)  # type: ignore[operator]
+            .first_or_none()
+        )
+
+        if previous is None:
+            self._logger.info(
+                "No previously processed version for %s, processing all pages",
+                version.provider.slug,
+            )
+            return full_plan
+
+        previous_vectorized_dir = (
+            workspace_root
+            / previous.pipeline_run_id
+            / "vectorized"
+            / ProviderVersion(
+                provider=version.provider,
+                version=previous.version,
+                provider_version_id=previous.provider_version_id,
+            ).workspace_name
+        )
+
+        if not await aiofiles.os.path.isdir(previous_vectorized_dir):
+            self._logger.warning(
+                "Artifacts of %s %s not found in '%s', processing all pages",
+                version.provider.slug,
+                previous.version,
+                previous_vectorized_dir,
+            )
+            return full_plan
+
+        previous_hashes = {page.key: page.hash for page in previous.pages}
+        unchanged = {
+            page["key"]
+            for page in pages
+            if previous_hashes.get(page["key"]) == page["hash"]
+        }
+
+        chunks = await self.__load_previous_chunks(previous_vectorized_dir)
+
+        # Страница переносится, только если все её чанки можно перенести:
+        # чанк, захвативший изменённую страницу, тянет за собой на переобработку и остальные свои страницы
+        carried_pages = unchanged & set[str]().union(*(chunk.pages for chunk in chunks))
+        while True:
+            dropped_pages = set[str]().union(
+                *(chunk.pages for chunk in chunks if not chunk.pages <= carried_pages)
+            )
+            if not dropped_pages & carried_pages:
+                break
+            carried_pages -= dropped_pages
+
+        plan = VersionDeltaPlan(
+            pages_to_prepare=[page for page in pages if page["key"] not in carried_pages],
+            base_version=previous.version,
+            carried_chunks=[
+                chunk
+                for chunk in chunks
+                if chunk.pages and chunk.pages <= carried_pages
+            ],
+        )
+
+        self._logger.info(
+            "Delta of %s %s against %s: %d/%d pages to prepare, %d chunks carried over",
+            version.provider.slug,
+            version.version,
+            previous.version,
+            len(plan.pages_to_prepare),
+            len(pages),
+            len(plan.carried_chunks),
+        )
+
+        return plan
+
+    async def carry_over(
+        self,
+        *,
+        plan: VersionDeltaPlan,
+        output_dir: Path,
+        metadata: dict[str, Any],
+    ) -> None:
+        shard_rows: defaultdict[Path, list[int]] = defaultdict(list)
+
+        for chunk in plan.carried_chunks:
+            if chunk.row is not None:
+                shard_rows[chunk.path].append(chunk.row)
+                continue
+
+            document = cast(Document, await load_json_from_file(chunk.path))
+            self.__mark_carried(document["payload"]["metadata"], plan, metadata)
+            # Новый id, чтобы точка предыдущей версии в векторной базе не перезаписалась
+            document["id"] = str(uuid4())
+
+            target_path = output_dir / chunk.path.name
+            if await aiofiles.os.path.exists(target_path):
+                target_path = output_dir / f"{chunk.path.stem}_{uuid4().hex[:8]}{chunk.path.suffix}"
+
+            await save_json_to_file(target_path, document)
+
+        for path, rows in shard_rows.items():
+            await self.__carry_over_shard(path, rows, plan, output_dir, metadata)
+
+    async def __carry_over_shard(
+        self,
+        path: Path,
+        rows: list[int],
+        plan: VersionDeltaPlan,
+        output_dir: Path,
+        metadata: dict[str, Any],
+    ) -> None:
+        """Переносимые строки шарда копируются в новый шард без преобразования векторов"""
+
+        source_rows, vectors = await load_vector_shard(path)
+        carried_rows: list[VectorShardRow] = []
+
+        for index in rows:
+            row = source_rows[index]
+            self.__mark_carried(row["payload"]["metadata"], plan, metadata)
+            carried_rows.append({**row, "id": str(uuid4())})
+
+        await save_vector_shard(
+            output_dir / f"carried-{path.stem}_{uuid4().hex[:8]}{path.suffix}",
+            carried_rows,
+            vectors[rows],
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def __mark_carried(
+        self,
+        chunk_metadata: dict[str, Any],
+        plan: VersionDeltaPlan,
+        metadata: dict[str, Any],
+    ) -> None:
+        chunk_metadata.update({**metadata, "carried_from_version": plan.base_version})
+
+    async def __load_previous_chunks(self, directory: Path) -> list[VectorizedChunk]:
+        chunks: list[VectorizedChunk] = []
+
+        for path in sorted(list_document_files(directory)):
+            try:
+                document = cast(Document, await load_json_from_file(path))
+            except Exception as error:
+                self._logger.warning(
+                    f"Cant read file '{path}', {traceback.format_exception_only(error)}:{error}"
+                )
+                continue
+
+            chunks.append(
+                VectorizedChunk(
+                    path=path,
+                    pages=frozenset(document["payload"]["metadata"].get("pages") or []),
+                )
+            )
+
+        # Для планирования достаточно payload шардов, сами векторы читаются только при переносе
+        for path in list_vector_shards(directory):
+            try:
+                rows = await load_vector_shard_rows(path)
+            except Exception as error:
+                self._logger.warning(
+                    f"Cant read shard '{path}', {traceback.format_exception_only(error)}:{error}"
+                )
+                continue
+
+            chunks.extend(
+                VectorizedChunk(
+                    path=path,
+                    pages=frozenset(row["payload"]["metadata"].get("pages") or []),
+                    row=index,
+                )
+                for index, row in enumerate(rows)
+            )
+
+        return chunks
@@ -0,0 +1,22 @@
+from dependency_injector.wiring import Provide
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.http.http_client import HttpClient as BaseHttpClient
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import HttpSettings
+
+
+@injectable(container_tags=[DI_TAG])
+class HttpClient(BaseHttpClient):
+    def __init__(
+        self, http_config: HttpSettings = Provide["settings.provided.http"]
+    ) -> None:
+        super().__init__(
+            limit=http_config.limit,
+            limit_per_host=http_config.limit_per_host,
+            keepalive_timeout=http_config.keepalive_timeout_seconds,
+            ttl_dns_cache=http_config.dns_cache_ttl_seconds,
+            total_timeout=http_config.total_timeout_seconds,
+            connect_timeout=http_config.connect_timeout_seconds,
+            sock_read_timeout=http_config.sock_read_timeout_seconds,
+        )
@@ -0,0 +1,58 @@
+import json
+import re
+from asyncio import StreamReader
+from collections import deque
+
+from src.common.logger.logger import Logger
+from src.kdctl.types.progress import ProgressEvent
+
+KDCTL_COMMAND = ("python3.13", "-m", "src.kdctl.main")
+
+# Строки логов kdctl могут содержать фрагменты документов
+KDCTL_STREAM_LIMIT = 16 * 1024 * 1024
+
+_STDERR_TAIL_LINES = 20
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+_LOG_LEVEL = re.compile(r" - (CRITICAL|ERROR|WARNING|INFO|DEBUG) - ")
+
+
+def parse_progress_event(line: bytes) -> ProgressEvent | None:
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+
+    if not isinstance(message, dict) or "event" not in message or "command" not in message:
+        return None
+
+    return message  # type: ignore[return-value]
+
+
+async def relay_kdctl_stderr(
+    stream: StreamReader, logger: Logger, source: str
+) -> deque[str]:
+    """
+    Построчно пересылает логи процесса kdctl в логгер сервиса с уровнем исходной записи.
+    Возвращает последние строки, чтобы приложить их к ошибке при аварийном завершении.
+    """
+
+    tail: deque[str] = deque(maxlen=_STDERR_TAIL_LINES)
+
+    async for raw_line in stream:
+        line = _ANSI_ESCAPE.sub("", raw_line.decode(errors="replace")).rstrip()
+        if not line:
+            continue
+
+        tail.append(line)
+
+        match = _LOG_LEVEL.search(line)
+        level = match.group(1) if match else "DEBUG"
+
+        if level in ("CRITICAL", "ERROR"):
+            logger.error(f"{source}: {line}")
+        elif level == "WARNING":
+            logger.warning(f"{source}: {line}")
+        else:
+            logger.debug(f"{source}: {line}")
+
+    return tail
@@ -0,0 +1,368 @@
+import json
+import time
+from asyncio import StreamReader, create_subprocess_exec, create_task, gather, sleep
+from asyncio.subprocess import PIPE
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+
+from langchain.chat_models import BaseChatModel
+from langchain_openai import OpenAIEmbeddings
+from qdrant_client import AsyncQdrantClient
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.interfaces.destroyable import IAsyncDestroyable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.components.kdctl.kdctl_process import (
+    KDCTL_COMMAND,
+    KDCTL_STREAM_LIMIT,
+    parse_progress_event,
+    relay_kdctl_stderr,
+)
+from src.documentation_processing.components.kdctl.kdctl_worker_pool import (
+    KdctlWorkerPool,
+)
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import Settings
+from src.kdctl.commands.impl.documents_prepare_command import (
+    DocumentsPrepareArgs,
+    DocumentsPrepareCommand,
+)
+from src.kdctl.commands.impl.documents_upload_command import (
+    DocumentsUploadArgs,
+    DocumentsUploadCommand,
+)
+from src.kdctl.commands.impl.documents_vectorize_command import (
+    DocumentsVectorizeArgs,
+    DocumentsVectorizeCommand,
+)
+from src.kdctl.components.markdown_splitter import MarkdownSplitter
+from src.kdctl.components.progress_reporter import ProgressReporter
+from src.kdctl.components.token_partitioner import TokenPartitioner
+from src.kdctl.types.progress import ProgressEvent
+
+
+@dataclass
+class KdctlCommandStats:
+    runs: int = 0
+    failed: int = 0
+    documents: int = 0
+    bytes: int = 0
+    tokens: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _Step:
+    command: str
+    stats: KdctlCommandStats
+    started_at: float = field(default_factory=time.monotonic)
+    last_event_at: float = field(default_factory=time.monotonic)
+    last_event: ProgressEvent | None = None
+
+
+@injectable(container_tags=[DI_TAG])
+class KdctlRunner(LoggerMixin, IAsyncDestroyable):
+    """
+    Выполняет команды kdctl в режиме processing.kdctl_mode.
+    В режиме in_process команды вызываются напрямую, а клиенты LLM, эмбеддингов и Qdrant
+    создаются при первом вызове и переиспользуются для всех версий (аргументы подключения
+    берутся из настроек и не меняются между вызовами).
+    В режиме subprocess каждая команда запускается отдельным интерпретатором для изоляции,
+    в режиме worker_pool - на пуле долгоживущих процессов `kdctl serve`.
+    События прогресса команд во всех режимах собираются в статистику по командам,
+    а шаг без событий дольше processing.kdctl_stall_warning_seconds отмечается в логе.
+    """
+
+    def __init__(self, settings: Settings, worker_pool: KdctlWorkerPool) -> None:
+        super().__init__()
+        self.__settings = settings
+        self.__worker_pool = worker_pool
+        self.__progress_reporter = ProgressReporter()
+        self.__prepare_command = DocumentsPrepareCommand(
+            self.__progress_reporter, MarkdownSplitter(), TokenPartitioner()
+        )
+        self.__vectorize_command = DocumentsVectorizeCommand(self.__progress_reporter)
+        self.__upload_command = DocumentsUploadCommand(self.__progress_reporter)
+        self.__llm: BaseChatModel | None = None
+        self.__embeddings: OpenAIEmbeddings | None = None
+        self.__qdrant_client: AsyncQdrantClient | None = None
+        self.__stats: dict[str, KdctlCommandStats] = {}
+
+    @property
+    def in_process(self) -> bool:
+        return self.__settings.processing.kdctl_mode == "in_process"
+
+    @property
+    def stats(self) -> dict[str, KdctlCommandStats]:
+        return {command: replace(stats) for command, stats in self.__stats.items()}
+
+    def reset_stats(self) -> None:
+        self.__stats = {}
+
+    async def prepare(self, args: DocumentsPrepareArgs) -> None:
+        async with self.__step("documents-prepare") as step:
+            if not self.in_process:
+                await self.__run_isolated(self.__prepare_command_line(args), step)
+                return
+
+            if self.__llm is None and args.splitter == "llm":
+                self.__llm = self.__prepare_command.create_llm(args)
+
+            with self.__progress_reporter.use_sink(
+                lambda event: self.__on_progress(step, event)
+            ):
+                await self.__prepare_command.run(args, llm=self.__llm)
+
+    async def vectorize(self, args: DocumentsVectorizeArgs) -> None:
+        async with self.__step("documents-vectorize") as step:
+            if not self.in_process:
+                await self.__run_isolated(self.__vectorize_command_line(args), step)
+                return
+
+            if self.__embeddings is None:
+                self.__embeddings = self.__vectorize_command.create_llm(args)
+
+            with self.__progress_reporter.use_sink(
+                lambda event: self.__on_progress(step, event)
+            ):
+                await self.__vectorize_command.run(args, llm=self.__embeddings)
+
+    async def upload(self, args: DocumentsUploadArgs) -> None:
+        async with self.__step("documents-upload") as step:
+            if not self.in_process:
+                await self.__run_isolated(self.__upload_command_line(args), step)
+                return
+
+            if self.__qdrant_client is None:
+                self.__qdrant_client = self.__upload_command.create_client(args)
+
+            with self.__progress_reporter.use_sink(
+                lambda event: self.__on_progress(step, event)
+            ):
+                await self.__upload_command.run(args, client=self.__qdrant_client)
+
+    async def destroy(self) -> None:
+        if self.__qdrant_client is not None:
+            await self.__qdrant_client.close()
+            self.__qdrant_client = None
+
+        self.__llm = None
+        self.__embeddings = None
+
+    @asynccontextmanager
+    async def __step(self, command: str) -> AsyncIterator[_Step]:
+        step = _Step(
+            command=command,
+            stats=self.__stats.setdefault(command, KdctlCommandStats()),
+        )
+        watchdog = create_task(self.__watch(step))
+
+        try:
+            yield step
+        except BaseException:
+            step.stats.failed += 1
+            raise
+        finally:
+            watchdog.cancel()
+
+            elapsed = time.monotonic() - step.started_at
+            step.stats.runs += 1
+            step.stats.seconds += elapsed
+
+            event = step.last_event
+            self._logger.info(
+                f"{command} finished in {elapsed:.1f}s: "
+                f"documents={event['documents'] if event else 0}, "
+                f"tokens={event['tokens'] if event else 0}, "
+                f"errors={event['errors'] if event else 0}"
+            )
+
+    def __on_progress(self, step: _Step, event: ProgressEvent) -> None:
+        previous = step.last_event
+        step.stats.documents += event["documents"] - (previous["documents"] if previous else 0)
+        step.stats.bytes += event["bytes"] - (previous["bytes"] if previous else 0)
+        step.stats.tokens += event["tokens"] - (previous["tokens"] if previous else 0)
+        step.stats.errors += event["errors"] - (previous["errors"] if previous else 0)
+        step.last_event = event
+        step.last_event_at = time.monotonic()
+
+        message = f": {event['message']}" if "message" in event else ""
+
+        if event["event"] == "error":
+            self._logger.warning(f"{step.command} error{message}")
+        else:
+            self._logger.debug(
+                f"{step.command} {event['event']}, "
+                f"documents={event['documents']}/{event['total'] or '?'}, "
+                f"bytes={event['bytes']}, tokens={event['tokens']}{message}"
+            )
+
+    async def __watch(self, step: _Step) -> None:
+        stall_seconds = self.__settings.processing.kdctl_stall_warning_seconds
+
+        while True:
+            await sleep(stall_seconds)
+
+            idle_seconds = time.monotonic() - step.last_event_at
+            if idle_seconds >= stall_seconds:
+                self._logger.warning(
+                    f"{step.command} made no progress for {idle_seconds:.0f}s, "
+                    f"last event: {step.last_event}"
+                )
+
+    # noinspection PyMethodMayBeStatic
+    def __prepare_command_line(self, args: DocumentsPrepareArgs) -> list[str]:
+        command = [
+            "documents-prepare",
+            "--api-key",
+            args.api_key.get_secret_value(),
+            "--model",
+            args.model,
+            "--input",
+            str(args.input_file_path),
+            "--output",
+            str(args.output_folder_path),
+            "--metadata",
+            json.dumps(args.metadata),
+            "--splitter",
+            args.splitter,
+            "--part-tokens",
+            str(args.part_tokens),
+            "--llm-concurrency",
+            str(args.llm_concurrency),
+            "--llm-max-retries",
+            str(args.llm_max_retries),
+            "--cache-path",
+            str(args.cache_path),
+            "--cache-max-size-bytes",
+            str(args.cache_max_size_bytes),
+        ]
+
+        if not args.cache_enabled:
+            command.append("--no-cache")
+        if args.resume:
+            command.append("--resume")
+        if args.per_page:
+            command.extend(["--per-page", "--page-split-tokens", str(args.page_split_tokens)])
+
+        if args.pages_index_path is not None:
+            command.extend(["--pages-index", str(args.pages_index_path)])
+        if args.base_url:
+            command.extend(["--base-url", args.base_url])
+
+        return command
+
+    # noinspection PyMethodMayBeStatic
+    def __vectorize_command_line(self, args: DocumentsVectorizeArgs) -> list[str]:
+        command = [
+            "documents-vectorize",
+            "--api-key",
+            args.api_key.get_secret_value(),
+            "--model",
+            args.model,
+            "--input",
+            str(args.input_folder_path),
+            "--output",
+            str(args.output_folder_path),
+        ]
+
+        if args.base_url:
+            command.extend(["--base-url", args.base_url])
+        command.extend(
+            [
+                "--batch-size",
+                str(args.batch_size),
+                "--batch-tokens",
+                str(args.batch_tokens),
+                "--max-retries",
+                str(args.max_retries),
+                "--max-concurrency",
+                str(args.max_concurrency),
+                "--memory-budget-bytes",
+                str(args.memory_budget_bytes),
+                "--format",
+                args.format,
+                "--dtype",
+                args.dtype,
+                "--cache-path",
+                str(args.cache_path),
+                "--cache-max-size-bytes",
+                str(args.cache_max_size_bytes),
+            ]
+        )
+
+        if not args.cache_enabled:
+            command.append("--no-cache")
+        if args.follow:
+            command.extend(
+                ["--follow", "--follow-idle-timeout", str(args.follow_idle_timeout_seconds)]
+            )
+
+        return command
+
+    # noinspection PyMethodMayBeStatic
+    def __upload_command_line(self, args: DocumentsUploadArgs) -> list[str]:
+        command = [
+            "documents-upload",
+            "--host",
+            args.host,
+            "--port",
+            str(args.port),
+            "--password",
+            args.password,
+            "--collection",
+            args.collection,
+            "--input",
+            str(args.input_folder_path),
+        ]
+
+        if args.secured:
+            command.append("--secured")
+
+        return command
+
+    async def __run_isolated(self, arguments: list[str], step: _Step) -> None:
+        if self.__settings.processing.kdctl_mode == "worker_pool":
+            await self.__worker_pool.call(
+                arguments, on_progress=lambda event: self.__on_progress(step, event)
+            )
+            return
+
+        command = [*KDCTL_COMMAND, *arguments]
+
+        self._logger.debug(f"Executing: {" ".join(command)}")
+        process = await create_subprocess_exec(
+            *command, stdout=PIPE, stderr=PIPE, limit=KDCTL_STREAM_LIMIT
+        )
+        assert process.stdout is not None and process.stderr is not None
+
+        try:
+            _, stderr_tail = await gather(
+                self.__read_progress(process.stdout, step),
+                relay_kdctl_stderr(process.stderr, self._logger, step.command),
+            )
+            returncode = await process.wait()
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+        if returncode != 0:
+            raise RuntimeError(
+                f"Command {step.command} failed with code {returncode}, "
+                f"last output: {' | '.join(stderr_tail)}"
+            )
+
+    async def __read_progress(self, stream: StreamReader, step: _Step) -> None:
+        async for line in stream:
+            event = parse_progress_event(line)
+
+            if event is not None:
+                self.__on_progress(step, event)
+            elif line.strip():
+                self._logger.debug(
+                    f"{step.command}: {line.decode(errors='replace').rstrip()}"
+                )
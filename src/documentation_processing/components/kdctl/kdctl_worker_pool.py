@@ -0,0 +1,171 @@
+import json
+from asyncio import Queue, Task, create_subprocess_exec, create_task, wait_for
+from asyncio.subprocess import PIPE, Process
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import count
+from typing import Any
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.interfaces.destroyable import IAsyncDestroyable
+from src.common.interfaces.runnable import IAsyncRunnable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.components.kdctl.kdctl_process import (
+    KDCTL_COMMAND,
+    KDCTL_STREAM_LIMIT,
+    relay_kdctl_stderr,
+)
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import Settings
+from src.kdctl.types.progress import ProgressEvent
+
+_SHUTDOWN_TIMEOUT_SECONDS = 10.0
+
+
+@dataclass(eq=False)
+class _Worker:
+    process: Process
+    stderr_task: Task[deque[str]]
+
+
+@injectable(container_tags=[DI_TAG])
+class KdctlWorkerPool(LoggerMixin, IAsyncRunnable, IAsyncDestroyable):
+    """
+    Пул долгоживущих процессов `kdctl serve`, принимающих JSON-RPC запросы через stdin/stdout.
+    Каждый воркер выполняет один запрос за раз, интерпретатор и импорты прогреваются один раз,
+    а память команд изолирована от сервиса. Воркер, упавший или прерванный посреди запроса,
+    заменяется новым.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.__size = settings.processing.kdctl_workers
+        self.__idle: Queue[_Worker] = Queue()
+        self.__workers: set[_Worker] = set()
+        self.__request_ids = count(1)
+
+    async def run(self) -> None:
+        for _ in range(self.__size):
+            self.__idle.put_nowait(await self.__spawn())
+
+        self._logger.info(f"Initialization complete, {self.__size} kdctl workers started")
+
+    async def destroy(self) -> None:
+        for worker in list(self.__workers):
+            await self.__terminate(worker, graceful=True)
+
+        while not self.__idle.empty():
+            self.__idle.get_nowait()
+
+    async def call(
+        self,
+        arguments: list[str],
+        on_progress: Callable[[ProgressEvent], None] | None = None,
+    ) -> None:
+        """Выполняет команду kdctl (имя команды и её аргументы) на свободном воркере"""
+
+        worker = await self.__idle.get()
+
+        try:
+            error = await self.__exchange(worker, arguments, on_progress)
+        except BaseException:
+            await self.__terminate(worker, graceful=False)
+            self.__idle.put_nowait(await self.__spawn())
+            raise
+
+        self.__idle.put_nowait(worker)
+
+        if error is not None:
+            raise RuntimeError(
+                f"Command {arguments[0]} failed in kdctl worker: {error.get('message')}"
+            )
+
+    async def __exchange(
+        self,
+        worker: _Worker,
+        arguments: list[str],
+        on_progress: Callable[[ProgressEvent], None] | None,
+    ) -> dict[str, Any] | None:
+        request_id = next(self.__request_ids)
+        stdin, stdout = worker.process.stdin, worker.process.stdout
+        assert stdin is not None and stdout is not None
+
+        stdin.write(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": arguments[0],
+                    "params": arguments[1:],
+                }
+            ).encode()
+            + b"\n"
+        )
+        await stdin.drain()
+
+        while line := await stdout.readline():
+            message = json.loads(line)
+
+            if message.get("method") == "progress":
+                params = dict(message.get("params") or {})
+                params.pop("id", None)
+
+                if on_progress is not None and "event" in params:
+                    on_progress(params)  # type: ignore[arg-type]
+                else:
+                    self._logger.debug(f"kdctl worker {worker.process.pid}: {params}")
+                continue
+
+            if message.get("id") != request_id:
+                self._logger.warning(f"Unexpected message from kdctl worker: {message}")
+                continue
+
+            return message.get("error")
+
+        raise RuntimeError(
+            f"kdctl worker {worker.process.pid} exited with code {await worker.process.wait()}"
+        )
+
+    async def __spawn(self) -> _Worker:
+        process = await create_subprocess_exec(
+            *KDCTL_COMMAND,
+            "serve",
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=PIPE,
+            limit=KDCTL_STREAM_LIMIT,
+        )
+        assert process.stderr is not None
+
+        worker = _Worker(
+            process=process,
+            stderr_task=create_task(
+                relay_kdctl_stderr(
+                    process.stderr, self._logger, f"kdctl worker {process.pid}"
+                )
+            ),
+        )
+        self.__workers.add(worker)
+
+        return worker
+
+    async def __terminate(self, worker: _Worker, *, graceful: bool) -> None:
+        """Свободный воркер завершается по закрытию stdin, прерванный посреди запроса - сразу"""
+
+        self.__workers.discard(worker)
+
+        if worker.process.returncode is None:
+            if graceful and worker.process.stdin is not None:
+                worker.process.stdin.close()
+
+                try:
+                    await wait_for(worker.process.wait(), _SHUTDOWN_TIMEOUT_SECONDS)
+                except TimeoutError:
+                    pass
+
+            if worker.process.returncode is None:
+                worker.process.kill()
+                await worker.process.wait()
+
+        worker.stderr_task.cancel()
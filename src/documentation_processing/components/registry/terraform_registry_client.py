@@ -0,0 +1,290 @@
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, TypedDict
+
+import aiohttp
+import orjson
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.common.rate_limiting.adaptive_concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+)
+from src.common.rate_limiting.token_bucket import TokenBucket
+from src.documentation_processing.components.cache.registry_response_cache import (
+    RegistryResponseCache,
+)
+from src.documentation_processing.components.http.http_client import HttpClient
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import Settings
+
+type RegistryPayload = dict[str, Any]
+
+
+class _CachedResponse(TypedDict):
+    etag: str | None
+    last_modified: str | None
+    immutable: bool
+    payload: RegistryPayload
+
+
+class _FetchedResponse(TypedDict):
+    not_modified: bool
+    etag: str | None
+    last_modified: str | None
+    payload: RegistryPayload | None
+
+
+@dataclass
+class RegistryClientStats:
+    requests: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    network_errors: int = 0
+    retries: int = 0
+    retry_wait_seconds: float = 0.0
+    rate_limit_wait_seconds: float = 0.0
+    concurrency_limit: int = 0
+
+
+@injectable(container_tags=[DI_TAG])
+class TerraformRegistryClient(LoggerMixin):
+    """
+    Клиент Terraform Registry с дисковым кэшем ответов.
+    Страницы документации, адресуемые по идентификатору, неизменяемы и отдаются из кэша без запроса,
+    остальные ответы перепроверяются условными запросами (ETag/If-Modified-Since).
+    Сетевые запросы проходят через token bucket и AIMD-ограничитель параллелизма,
+    429/5xx и сетевые ошибки повторяются с экспоненциальной задержкой с джиттером и учётом Retry-After.
+    """
+
+    def __init__(
+        self, settings: Settings, http_client: HttpClient, cache: RegistryResponseCache
+    ) -> None:
+        super().__init__()
+        self.__settings = settings
+        self.__http_client = http_client
+        self.__cache = cache
+        self.__token_bucket = TokenBucket(
+            rate=settings.registry.rate_limit_per_second,
+            capacity=settings.registry.rate_limit_burst,
+        )
+        self.__concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.registry.adaptive_concurrency_initial,
+            min_limit=settings.registry.adaptive_concurrency_min,
+            max_limit=settings.registry.adaptive_concurrency_max,
+            latency_target=settings.registry.adaptive_latency_target_seconds,
+        )
+        self.__backoff = wait_random_exponential(
+            multiplier=settings.registry.retry_backoff_base_seconds,
+            max=settings.registry.retry_backoff_max_seconds,
+        )
+        self.__stats = RegistryClientStats()
+
+    @property
+    def stats(self) -> RegistryClientStats:
+        return replace(
+            self.__stats, concurrency_limit=self.__concurrency_limiter.limit
+        )
+
+    def reset_stats(self) -> None:
+        self.__stats = RegistryClientStats()
+
+    async def get_provider(
+        self, namespace: str, name: str, include: str
+    ) -> RegistryPayload:
+        return await self.__get_json(
+            f"/v2/providers/{namespace}/{name}?include={include}"
+        )
+
+    async def get_provider_version(
+        self, provider_version_id: str, include: str
+    ) -> RegistryPayload:
+        return await self.__get_json(
+            f"/v2/provider-versions/{provider_version_id}?include={include}"
+        )
+
+    async def get_provider_doc(self, document_id: str) -> RegistryPayload:
+        return await self.__get_json(
+            f"/v2/provider-docs/{document_id}", immutable=True
+        )
+
+    async def __get_json(self, path: str, *, immutable: bool = False) -> RegistryPayload:
+        url = f"{self.__settings.registry.base_url.rstrip('/')}{path}"
+        cached = await self.__load_cached(url)
+
+        if cached is not None and cached["immutable"]:
+            self.__stats.cache_hits += 1
+            return cached["payload"]
+
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached["etag"] is not None:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"] is not None:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = await self.__fetch(url, headers)
+
+        if response["not_modified"] and cached is not None:
+            self.__stats.revalidated += 1
+            return cached["payload"]
+
+        payload = response["payload"]
+        if payload is None:
+            raise RuntimeError(f"Unexpected empty response for {url}")
+
+        if (
+            immutable
+            or response["etag"] is not None
+            or response["last_modified"] is not None
+        ):
+            await self.__store_cached(
+                url,
+                {
+                    "etag": response["etag"],
+                    "last_modified": response["last_modified"],
+                    "immutable": immutable,
+                    "payload": payload,
+                },
+            )
+
+        return payload
+
+    async def __fetch(self, url: str, headers: dict[str, str]) -> _FetchedResponse:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.__settings.registry.max_retries + 1),
+            wait=self.__retry_wait,
+            retry=retry_if_exception(self.__is_retryable),
+            before_sleep=self.__before_retry_sleep,
+            reraise=True,
+        )
+
+        async for attempt in retrying:
+            with attempt:
+                return await self.__fetch_once(url, headers)
+
+        raise RuntimeError(f"Retries exhausted for {url}")
+
+    async def __fetch_once(self, url: str, headers: dict[str, str]) -> _FetchedResponse:
+        self.__stats.rate_limit_wait_seconds += await self.__token_bucket.acquire()
+        await self.__concurrency_limiter.acquire()
+
+        started_at = time.monotonic()
+        overloaded = False
+
+        try:
+            self.__stats.requests += 1
+
+            async with self.__http_client.session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return {
+                        "not_modified": True,
+                        "etag": None,
+                        "last_modified": None,
+                        "payload": None,
+                    }
+
+                if response.status == 429:
+                    overloaded = True
+                    self.__stats.throttled += 1
+
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        self.__token_bucket.pause(retry_after)
+                elif response.status >= 500:
+                    overloaded = True
+                    self.__stats.server_errors += 1
+
+                response.raise_for_status()
+
+                return {
+                    "not_modified": False,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "payload": await self.__http_client.read_json(response),
+                }
+        except (aiohttp.ClientConnectionError, TimeoutError):
+            overloaded = True
+            self.__stats.network_errors += 1
+            raise
+        finally:
+            await self.__concurrency_limiter.release(
+                latency=time.monotonic() - started_at, overloaded=overloaded
+            )
+
+    def __retry_wait(self, retry_state: RetryCallState) -> float:
+        backoff = self.__backoff(retry_state)
+
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(error, aiohttp.ClientResponseError) and error.headers:
+            retry_after = _parse_retry_after(error.headers.get("Retry-After"))
+            if retry_after is not None:
+                return max(retry_after, backoff)
+
+        return backoff
+
+    def __before_retry_sleep(self, retry_state: RetryCallState) -> None:
+        delay = retry_state.next_action.sleep if retry_state.next_action else 0.0
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+
+        self.__stats.retries += 1
+        self.__stats.retry_wait_seconds += delay
+
+        self._logger.warning(
+            f"Registry request failed ({error}), "
+            f"attempt {retry_state.attempt_number}, retrying in {delay:.2f}s..."
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def __is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status == 429 or error.status >= 500
+
+        return isinstance(error, (aiohttp.ClientConnectionError, TimeoutError))
+
+    async def __load_cached(self, url: str) -> _CachedResponse | None:
+        if not self.__settings.registry.cache_enabled:
+            return None
+
+        raw = await self.__cache.get(url)
+        if raw is None:
+            return None
+
+        return orjson.loads(raw)
+
+    async def __store_cached(self, url: str, response: _CachedResponse) -> None:
+        if not self.__settings.registry.cache_enabled:
+            return
+
+        await self.__cache.set(url, orjson.dumps(response))
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,122 @@
+import traceback
+from asyncio import Condition, gather
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.models.internal import ProviderVersion
+from src.documentation_processing.settings import Settings
+
+_UNKNOWN_PUBLISHED_AT = datetime.min.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class VersionScheduleResult:
+    processed: list[ProviderVersion] = field(default_factory=list)
+    failed: list[ProviderVersion] = field(default_factory=list)
+
+
+@injectable(container_tags=[DI_TAG])
+class VersionScheduler(LoggerMixin):
+    """
+    Обрабатывает очередь версий с общим лимитом параллелизма и лимитом на провайдера.
+    Очередь чередует провайдеров, внутри провайдера версии идут от новых к старым,
+    поэтому долгий backfill одного провайдера не задерживает свежие версии остальных.
+    Ошибка обработки версии не прерывает остальные: версия не фиксируется как обработанная
+    и будет выбрана снова при следующем запуске.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.__settings = settings
+
+    async def run(
+        self,
+        versions: list[ProviderVersion],
+        handler: Callable[[ProviderVersion], Awaitable[None]],
+    ) -> VersionScheduleResult:
+        result = VersionScheduleResult()
+        pending = self.__order(versions)
+        running = Counter[str]()
+        condition = Condition()
+        provider_limit = self.__settings.processing.provider_version_concurrency
+
+        async def take() -> ProviderVersion | None:
+            async with condition:
+                while pending:
+                    version = next(
+                        (
+                            version
+                            for version in pending
+                            if running[version.provider.slug] < provider_limit
+                        ),
+                        None,
+                    )
+
+                    if version is not None:
+                        pending.remove(version)
+                        running[version.provider.slug] += 1
+                        return version
+
+                    await condition.wait()
+
+                return None
+
+        async def worker() -> None:
+            while (version := await take()) is not None:
+                try:
+                    await handler(version)
+                    result.processed.append(version)
+                except Exception as error:
+                    self._logger.error(
+                        f"Processing of {version.provider.slug} {version.version} failed: "
+                        f"{traceback.format_exception_only(error)}"
+                    )
+                    result.failed.append(version)
+                finally:
+                    async with condition:
+                        running[version.provider.slug] -= 1
+                        condition.notify_all()
+
+        workers_count = min(self.__settings.processing.version_concurrency, len(pending))
+        self._logger.info(
+            "Scheduling %d versions of %d providers (workers=%d, per provider=%d)",
+            len(pending),
+            len({version.provider.slug for version in pending}),
+            workers_count,
+            provider_limit,
+        )
+
+        await gather(*(worker() for _ in range(workers_count)))
+
+        self._logger.info(
+            "Scheduled processing finished: %d processed, %d failed",
+            len(result.processed),
+            len(result.failed),
+        )
+
+        return result
+
+    # noinspection PyMethodMayBeStatic
+    def __order(self, versions: list[ProviderVersion]) -> list[ProviderVersion]:
+        by_provider = defaultdict[str, list[ProviderVersion]](list)
+        for version in versions:
+            by_provider[version.provider.slug].append(version)
+
+        ranked: list[tuple[int, ProviderVersion]] = []
+        for provider_versions in by_provider.values():
+            provider_versions.sort(
+                key=lambda version: version.published_at or _UNKNOWN_PUBLISHED_AT, reverse=True
+            )
+            ranked.extend(enumerate(provider_versions))
+
+        ranked.sort(
+            key=lambda item: (-item[0], item[1].published_at or _UNKNOWN_PUBLISHED_AT),
+            reverse=True,
+        )
+
+        return [version for _, version in ranked]
@@ -0,0 +1,84 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import TypedDict, cast
+from uuid import uuid4
+
+import aiofiles.os
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.common.utils.fs_utils import load_data_from_file, save_data_to_file
+from src.documentation_processing.di_tag import DI_TAG
+from src.documentation_processing.settings import Settings
+
+
+class PageManifestEntry(TypedDict):
+    id: str
+    key: str
+    hash: str
+
+
+@injectable(container_tags=[DI_TAG])
+class PageStore(LoggerMixin):
+    """
+    Контентно-адресуемое хранилище страниц документации, общее для всех запусков и версий.
+    Страница хранится один раз под sha256 своего содержимого, а манифест версии
+    сопоставляет идентификаторы и ключи страниц Registry с хэшами в исходном порядке.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__()
+        self.__root = settings.processing.page_store_path
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def object_path(self, content_hash: str) -> Path:
+        return self.__root / "objects" / content_hash[:2] / f"{content_hash}.md"
+
+    async def put(self, content: str) -> str:
+        content_hash = self.hash_content(content)
+        path = self.object_path(content_hash)
+
+        if await aiofiles.os.path.exists(path):
+            return content_hash
+
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+
+        # Запись через временный файл, чтобы параллельные запуски не увидели частично записанную страницу
+        temporary_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        await save_data_to_file(temporary_path, content)
+        await aiofiles.os.replace(temporary_path, path)
+
+        return content_hash
+
+    async def get(self, content_hash: str) -> str | None:
+        path = self.object_path(content_hash)
+
+        if not await aiofiles.os.path.exists(path):
+            return None
+
+        return await load_data_from_file(path)
+
+    async def load_manifest(self, name: str) -> list[PageManifestEntry] | None:
+        path = self.__manifest_path(name)
+
+        if not await aiofiles.os.path.exists(path):
+            return None
+
+        return cast(list[PageManifestEntry], json.loads(await load_data_from_file(path)))
+
+    async def save_manifest(self, name: str, entries: list[PageManifestEntry]) -> None:
+        path = self.__manifest_path(name)
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+
+        temporary_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        await save_data_to_file(temporary_path, json.dumps(entries))
+        await aiofiles.os.replace(temporary_path, path)
+
+        self._logger.debug(f"Saved manifest '{name}' with {len(entries)} pages")
+
+    def __manifest_path(self, name: str) -> Path:
+        return self.__root / "manifests" / f"{name}.json"
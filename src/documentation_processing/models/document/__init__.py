@@ -1,7 +1,8 @@
 from .provider_settings import ProviderSettings
-from .provider_version_document import ProviderVersionDocument
+from .provider_version_document import ProviderVersionDocument, ProviderVersionPage
 
 __all__ = [
     "ProviderSettings",
     "ProviderVersionDocument",
+    "ProviderVersionPage",
 ]
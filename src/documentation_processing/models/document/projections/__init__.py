@@ -0,0 +1,5 @@
+from .provider_version_key import ProviderVersionKey
+
+__all__ = [
+    "ProviderVersionKey",
+]
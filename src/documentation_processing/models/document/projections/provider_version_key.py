@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class ProviderVersionKey(BaseModel):
+    namespace: str
+    name: str
+    version: str
@@ -10,6 +10,7 @@ class ProviderSettings(Document):
     namespace: str = Field(..., description="Terraform provider namespace")
     name: str = Field(..., description="Terraform provider name")
     enabled: bool = Field(default=True, description="Whether provider should be processed")
+    backfill_versions: int = Field(default=1, ge=1, description="How many newest versions should be processed")
 
     class Settings:
         name = "provider_settings"
@@ -1,12 +1,18 @@
 from datetime import datetime
 
 from beanie import Document
-from pydantic import Field
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 
 from src.common.dependency_injection.injectable import injectable
 from src.documentation_processing.di_tag import DI_TAG
 
 
+class ProviderVersionPage(BaseModel):
+    key: str = Field(..., description="Page key stable across provider versions")
+    hash: str = Field(..., description="sha256 of the page content")
+
+
 @injectable(container_tags=[DI_TAG])
 class ProviderVersionDocument(Document):
     namespace: str = Field(..., description="Terraform provider namespace")
@@ -15,7 +21,16 @@ class ProviderVersionDocument(Document):
     provider_version_id: str = Field(..., description="Provider version identifier from registry")
     pipeline_run_id: str = Field(..., description="Identifier of the pipeline run")
     documents: list[str] = Field(default_factory=list, description="Downloaded document identifiers")
+    pages: list[ProviderVersionPage] = Field(default_factory=list, description="Documentation pages with content hashes")
+    base_version: str | None = Field(default=None, description="Version whose unchanged chunks were carried over")
     processed_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "provider_versions"
+        indexes = [
+            IndexModel(
+                [("namespace", ASCENDING), ("name", ASCENDING), ("version", ASCENDING)],
+                name="namespace_name_version_unique",
+                unique=True,
+            ),
+        ]
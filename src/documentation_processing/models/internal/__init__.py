@@ -1,7 +1,8 @@
-from .pipeline import PipelineState, ProviderConfig, ProviderVersion
+from .pipeline import PipelineState, ProviderConfig, ProviderDoc, ProviderVersion
 
 __all__ = [
     "PipelineState",
     "ProviderConfig",
+    "ProviderDoc",
     "ProviderVersion",
 ]
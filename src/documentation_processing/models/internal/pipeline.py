@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 from uuid import UUID
 
@@ -7,19 +8,49 @@ from uuid import UUID
 class ProviderConfig:
     namespace: str
     name: str
+    backfill_versions: int = 1
 
     @property
     def slug(self) -> str:
         return f"{self.namespace}/{self.name}"
 
 
+@dataclass
+class ProviderDoc:
+    id: str
+    category: str
+    slug: str
+    title: str | None = None
+    subcategory: str | None = None
+    language: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Идентификатор страницы, стабильный между версиями провайдера (в отличие от id)"""
+
+        key = f"{self.category}/{self.slug}"
+        if self.language and self.language != "hcl":
+            key = f"{key}@{self.language}"
+
+        return key
+
+
 @dataclass
 class ProviderVersion:
     provider: ProviderConfig
     version: str
     provider_version_id: str
+    published_at: datetime | None = None
     documents: list[str] = field(default_factory=list)
 
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.provider.namespace, self.provider.name, self.version
+
+    @property
+    def workspace_name(self) -> str:
+        return f"{self.provider.namespace}_{self.provider.name}_{self.version}"
+
 
 @dataclass
 class PipelineState:
@@ -18,7 +18,11 @@ class LoadProviderSettingsNode(LoggerMixin, INode[PipelineState]):
         ).to_list()
 
         state.providers = [
-            ProviderConfig(namespace=provider.namespace, name=provider.name)
+            ProviderConfig(
+                namespace=provider.namespace,
+                name=provider.name,
+                backfill_versions=provider.backfill_versions,
+            )
             for provider in provider_settings
         ]
 
@@ -1,26 +1,131 @@
-import json
-from asyncio import create_subprocess_exec
-from asyncio.subprocess import PIPE
+from asyncio import CancelledError, Queue, Semaphore, Task, create_task
+from contextlib import AsyncExitStack, suppress
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Self
 
-import aiohttp
+import aiofiles
+from pydantic import SecretStr
+from pymongo.errors import DuplicateKeyError
 
+from src.common.concurrency.staged_executor import Stage, StagedExecutor
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
+from src.common.utils.fs_utils import save_json_to_file
+from src.documentation_processing.components.delta.version_delta_planner import (
+    VersionDeltaPlan,
+    VersionDeltaPlanner,
+)
+from src.documentation_processing.components.kdctl.kdctl_runner import KdctlRunner
+from src.documentation_processing.components.registry.terraform_registry_client import (
+    TerraformRegistryClient,
+)
+from src.documentation_processing.components.scheduling.version_scheduler import (
+    VersionScheduler,
+)
+from src.documentation_processing.components.storage.page_store import (
+    PageManifestEntry,
+    PageStore,
+)
 from src.documentation_processing.di_tag import DI_TAG
-from src.documentation_processing.models.document import ProviderVersionDocument
-from src.documentation_processing.models.internal import PipelineState, ProviderVersion
+from src.documentation_processing.models.document import (
+    ProviderVersionDocument,
+    ProviderVersionPage,
+)
+from src.documentation_processing.models.internal import (
+    PipelineState,
+    ProviderDoc,
+    ProviderVersion,
+)
 from src.documentation_processing.nodes.interface.node import INode
 from src.documentation_processing.settings import Settings
+from src.kdctl.commands.impl.documents_prepare_command import DocumentsPrepareArgs
+from src.kdctl.commands.impl.documents_upload_command import DocumentsUploadArgs
+from src.kdctl.commands.impl.documents_vectorize_command import (
+    DocumentsVectorizeArgs,
+)
+from src.kdctl.types.page_index import PageSpan
+from src.kdctl.types.page_input import PageInput
 
 _PROVIDER_DOCS_INCLUDE = "provider-docs"
+_DOCUMENTS_SEPARATOR = "\n\n"
+_COMBINE_WINDOW_FACTOR = 4
+
+
+@dataclass
+class _Workspace:
+    root: Path
+    combined_dir: Path
+    prepared_dir: Path
+    vectorized_dir: Path
+    run_id: str
+
+
+@dataclass
+class _VersionJob:
+    version: ProviderVersion
+    pages: list[PageManifestEntry]
+    plan: VersionDeltaPlan
+    input_path: Path
+    pages_index_path: Path | None
+    prepared_output_dir: Path
+    vectorized_output_dir: Path
+    metadata: dict[str, Any]
+
+
+class _CombinedDocumentWriter:
+    """Последовательно дописывает страницы в объединённый файл, запоминая их границы"""
+
+    def __init__(self, path: Path) -> None:
+        self.__path = path
+        self.__position = 0
+        self.spans: list[PageSpan] = []
+
+    async def __aenter__(self) -> Self:
+        self.__file = await aiofiles.open(self.__path, "w", encoding="utf-8")
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.__file.close()
+
+    async def write_page(self, key: str, content: str) -> None:
+        # Границы считаются в символах, а kdctl читает файл в текстовом режиме с нормализацией переводов строк
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+        if self.spans:
+            await self.__file.write(_DOCUMENTS_SEPARATOR)
+            self.__position += len(_DOCUMENTS_SEPARATOR)
+
+        await self.__file.write(content)
+        self.spans.append(
+            {
+                "key": key,
+                "start": self.__position,
+                "end": self.__position + len(content),
+            }
+        )
+        self.__position += len(content)
 
 
 @injectable(container_tags=[DI_TAG])
 class ProcessProviderVersionNode(LoggerMixin, INode[PipelineState]):
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        registry_client: TerraformRegistryClient,
+        page_store: PageStore,
+        delta_planner: VersionDeltaPlanner,
+        version_scheduler: VersionScheduler,
+        kdctl_runner: KdctlRunner,
+    ) -> None:
         super().__init__()
         self.__settings = settings
+        self.__registry_client = registry_client
+        self.__page_store = page_store
+        self.__delta_planner = delta_planner
+        self.__version_scheduler = version_scheduler
+        self.__kdctl_runner = kdctl_runner
 
     async def execute(self, state: PipelineState) -> PipelineState:
         self._logger.info("Processing versions...")
@@ -32,42 +137,58 @@ class ProcessProviderVersionNode(LoggerMixin, INode[PipelineState]):
             return state
 
         workspace_root = state.workspace_root / str(state.run_id)
-        raw_documents_dir = workspace_root / "raw_documents"
-        combined_dir = workspace_root / "raw_documents_combined"
-        prepared_dir = workspace_root / "prepared"
-        vectorized_dir = workspace_root / "vectorized"
-
-        raw_documents_dir.mkdir(parents=True, exist_ok=True)
-        combined_dir.mkdir(parents=True, exist_ok=True)
-        prepared_dir.mkdir(parents=True, exist_ok=True)
-        vectorized_dir.mkdir(parents=True, exist_ok=True)
-
-        async with aiohttp.ClientSession() as session:
-            for version in state.versions_to_process:
-                await self.__process_version(
-                    session=session,
-                    version=version,
-                    raw_documents_dir=raw_documents_dir,
-                    combined_dir=combined_dir,
-                    prepared_dir=prepared_dir,
-                    vectorized_dir=vectorized_dir,
-                    run_id=str(state.run_id),
-                )
+        workspace = _Workspace(
+            root=state.workspace_root,
+            combined_dir=workspace_root / "raw_documents_combined",
+            prepared_dir=workspace_root / "prepared",
+            vectorized_dir=workspace_root / "vectorized",
+            run_id=str(state.run_id),
+        )
+
+        workspace.combined_dir.mkdir(parents=True, exist_ok=True)
+        workspace.prepared_dir.mkdir(parents=True, exist_ok=True)
+        workspace.vectorized_dir.mkdir(parents=True, exist_ok=True)
+
+        processing = self.__settings.processing
+        stages = [
+            Stage(
+                name="download",
+                handler=lambda version: self.__download_stage(version, workspace),
+                concurrency=processing.download_stage_concurrency,
+            ),
+            Stage(
+                name="prepare",
+                handler=self.__prepare_stage,
+                concurrency=processing.prepare_stage_concurrency,
+            ),
+            Stage(
+                name="vectorize",
+                handler=self.__vectorize_stage,
+                concurrency=processing.vectorize_stage_concurrency,
+            ),
+            Stage(
+                name="upload",
+                handler=lambda job: self.__upload_stage(job, workspace),
+                concurrency=processing.upload_stage_concurrency,
+            ),
+        ]
+
+        # Планировщик решает, какие версии и в каком порядке входят в конвейер,
+        # а стадии разных версий выполняются одновременно. Версия занимает слот своего провайдера
+        # до конца загрузки, поэтому при provider_version_concurrency=1 конвейером идут версии
+        # разных провайдеров, а версии одного провайдера — последовательно, чтобы каждая считала
+        # дельту относительно уже записанной предыдущей
+        async with StagedExecutor(stages, queue_size=processing.stage_queue_size) as executor:
+            await self.__version_scheduler.run(state.versions_to_process, executor.submit)
 
         return state
 
-    async def __process_version(
-        self,
-        *,
-        session: aiohttp.ClientSession,
-        version: ProviderVersion,
-        raw_documents_dir: Path,
-        combined_dir: Path,
-        prepared_dir: Path,
-        vectorized_dir: Path,
-        run_id: str,
-    ) -> None:
-        provider_docs = await self.__fetch_provider_docs(session, version)
+    async def __download_stage(
+        self, version: ProviderVersion, workspace: _Workspace
+    ) -> _VersionJob | None:
+        """Скачивает страницы версии, считает дельту и собирает Markdown для подготовки"""
+
+        provider_docs = await self.__fetch_provider_docs(version)
 
         if not provider_docs:
             self._logger.warning(
@@ -75,210 +196,367 @@ class ProcessProviderVersionNode(LoggerMixin, INode[PipelineState]):
                 version.provider.slug,
                 version.version,
             )
-            return
+            return None
+
+        per_page = self.__settings.processing.prepare_mode == "per_page"
+        combined_path = workspace.combined_dir / f"{version.workspace_name}.md"
 
-        downloaded_documents = await self.__download_documents(
-            session=session,
+        # Постранично объединённый файл не нужен: страницы читаются из хранилища страниц
+        pages, page_spans = await self.__download_documents(
+            version=version,
             documents=provider_docs,
-            destination=raw_documents_dir,
+            combined_path=None if per_page else combined_path,
         )
 
-        combined_path = self.__combine_documents(
-            provider_version=version,
-            document_ids=downloaded_documents,
-            source_dir=raw_documents_dir,
-            destination_dir=combined_dir,
+        plan = await self.__delta_planner.plan(
+            version=version, pages=pages, workspace_root=workspace.root
         )
 
-        prepared_output_dir = prepared_dir / (
-            f"{version.provider.namespace}_{version.provider.name}_{version.version}"
+        if per_page:
+            input_path = workspace.combined_dir / f"{version.workspace_name}.pages_input.json"
+            pages_index_path = None
+
+            if plan.pages_to_prepare:
+                await self.__save_pages_input(
+                    pages=plan.pages_to_prepare, documents=provider_docs, path=input_path
+                )
+        else:
+            if plan.is_delta and plan.pages_to_prepare:
+                combined_path = workspace.combined_dir / f"{version.workspace_name}.delta.md"
+                page_spans = await self.__combine_stored_pages(
+                    pages=plan.pages_to_prepare, combined_path=combined_path
+                )
+
+            input_path = combined_path
+            pages_index_path = combined_path.with_suffix(".pages.json")
+            if plan.pages_to_prepare:
+                await save_json_to_file(pages_index_path, page_spans)  # type: ignore[arg-type]
+
+        job = _VersionJob(
+            version=version,
+            pages=pages,
+            plan=plan,
+            input_path=input_path,
+            pages_index_path=pages_index_path,
+            prepared_output_dir=workspace.prepared_dir / version.workspace_name,
+            vectorized_output_dir=workspace.vectorized_dir / version.workspace_name,
+            metadata={
+                "provider": version.provider.slug,
+                "version": version.version,
+                "run_id": workspace.run_id,
+            },
         )
-        prepared_output_dir.mkdir(parents=True, exist_ok=True)
 
-        metadata = {
-            "provider": version.provider.slug,
-            "version": version.version,
-            "run_id": run_id,
-        }
+        job.prepared_output_dir.mkdir(parents=True, exist_ok=True)
+        job.vectorized_output_dir.mkdir(parents=True, exist_ok=True)
+
+        return job
+
+    async def __prepare_stage(self, job: _VersionJob) -> _VersionJob:
+        if not job.plan.pages_to_prepare:
+            return job
+
+        prepare = self.__kdctl_runner.prepare(self.__prepare_args(job))
+
+        if not self.__settings.processing.vectorize_follow:
+            await prepare
+            return job
 
-        await self.__run_kdctl_prepare(
-            input_path=combined_path,
-            output_dir=prepared_output_dir,
-            metadata=metadata,
+        # Векторизация идёт параллельно подготовке и подхватывает документы по мере записи,
+        # при ошибке подготовки она прерывается, иначе ждала бы маркер завершения до таймаута
+        follower = create_task(
+            self.__kdctl_runner.vectorize(self.__vectorize_args(job, follow=True))
+        )
+        try:
+            await prepare
+        except BaseException:
+            follower.cancel()
+            with suppress(CancelledError, Exception):
+                await follower
+            raise
+
+        await follower
+        return job
+
+    async def __vectorize_stage(self, job: _VersionJob) -> _VersionJob:
+        if job.plan.pages_to_prepare and not self.__settings.processing.vectorize_follow:
+            await self.__kdctl_runner.vectorize(self.__vectorize_args(job))
+
+        await self.__delta_planner.carry_over(
+            plan=job.plan, output_dir=job.vectorized_output_dir, metadata=job.metadata
         )
 
-        vectorized_output_dir = vectorized_dir / (
-            f"{version.provider.namespace}_{version.provider.name}_{version.version}"
+        return job
+
+    def __prepare_args(self, job: _VersionJob) -> DocumentsPrepareArgs:
+        processing = self.__settings.processing
+
+        return DocumentsPrepareArgs(
+            input_file_path=job.input_path,
+            output_folder_path=job.prepared_output_dir,
+            api_key=SecretStr(self.__settings.app.openai_api_key),
+            base_url=self.__settings.app.llm_base_url,
+            model=self.__settings.app.prepare_model_name,
+            metadata=job.metadata,
+            pages_index_path=job.pages_index_path,
+            per_page=processing.prepare_mode == "per_page",
+            page_split_tokens=processing.prepare_page_split_tokens,
+            splitter=processing.prepare_splitter,
+            part_tokens=processing.prepare_part_tokens,
+            llm_concurrency=processing.prepare_llm_concurrency,
+            llm_max_retries=processing.prepare_llm_max_retries,
+            cache_enabled=processing.prepare_cache_enabled,
+            cache_path=processing.prepare_cache_path,
+            cache_max_size_bytes=processing.prepare_cache_max_size_bytes,
         )
-        vectorized_output_dir.mkdir(parents=True, exist_ok=True)
 
-        await self.__run_kdctl_vectorize(
-            input_dir=prepared_output_dir,
-            output_dir=vectorized_output_dir,
+    def __vectorize_args(self, job: _VersionJob, follow: bool = False) -> DocumentsVectorizeArgs:
+        processing = self.__settings.processing
+
+        return DocumentsVectorizeArgs(
+            input_folder_path=job.prepared_output_dir,
+            output_folder_path=job.vectorized_output_dir,
+            api_key=SecretStr(self.__settings.app.openai_api_key),
+            base_url=self.__settings.app.llm_base_url,
+            model=self.__settings.app.model_name,
+            follow=follow,
+            batch_size=processing.vectorize_batch_size,
+            batch_tokens=processing.vectorize_batch_tokens,
+            max_retries=processing.vectorize_max_retries,
+            max_concurrency=processing.vectorize_max_concurrency,
+            memory_budget_bytes=processing.vectorize_memory_budget_bytes,
+            format=processing.vectorize_format,
+            dtype=processing.vectorize_dtype,
+            cache_enabled=processing.vectorize_cache_enabled,
+            cache_path=processing.vectorize_cache_path,
+            cache_max_size_bytes=processing.vectorize_cache_max_size_bytes,
         )
 
-        await self.__run_kdctl_upload(input_dir=vectorized_output_dir)
-
-        await ProviderVersionDocument(
-            namespace=version.provider.namespace,
-            name=version.provider.name,
-            version=version.version,
-            provider_version_id=version.provider_version_id,
-            pipeline_run_id=run_id,
-            documents=downloaded_documents,
-        ).insert()
-
-    async def __fetch_provider_docs(
-        self, session: aiohttp.ClientSession, version: ProviderVersion
-    ) -> list[str]:
-        url = (
-            "https://registry.terraform.io/v2/provider-versions/"
-            f"{version.provider_version_id}?include={_PROVIDER_DOCS_INCLUDE}"
+    async def __upload_stage(self, job: _VersionJob, workspace: _Workspace) -> _VersionJob:
+        await self.__kdctl_runner.upload(
+            DocumentsUploadArgs(
+                port=self.__settings.db_qdrant.port,
+                host=self.__settings.db_qdrant.address,
+                password=self.__settings.db_qdrant.password,
+                secured=self.__settings.db_qdrant.secured,
+                collection=self.__settings.app.vector_database_collection,
+                input_folder_path=job.vectorized_output_dir,
+            )
         )
 
-        async with session.get(url) as response:
-            response.raise_for_status()
-            payload = await response.json()
+        await self.__save_processed_version(
+            version=job.version,
+            run_id=workspace.run_id,
+            pages=job.pages,
+            base_version=job.plan.base_version,
+        )
 
-        return [
-            item["id"]
-            for item in payload.get("included", [])
-            if item.get("type") == _PROVIDER_DOCS_INCLUDE and item.get("id") is not None
-        ]
+        return job
 
-    async def __download_documents(
+    # noinspection PyMethodMayBeStatic
+    async def __save_processed_version(
         self,
         *,
-        session: aiohttp.ClientSession,
-        documents: list[str],
-        destination: Path,
-    ) -> list[str]:
-        downloaded: list[str] = []
+        version: ProviderVersion,
+        run_id: str,
+        pages: list[PageManifestEntry],
+        base_version: str | None,
+    ) -> None:
+        """
+        Upsert по уникальному ключу (namespace, name, version) одной командой update_one:
+        поля ключа из фильтра попадают во вставляемый документ, а конфликт параллельных вставок
+        по уникальному индексу MongoDB 4.2+ разрешает сама, повторяя upsert как обновление.
+        """
+
+        collection = ProviderVersionDocument.get_pymongo_collection()
+        key = {
+            "namespace": version.provider.namespace,
+            "name": version.provider.name,
+            "version": version.version,
+        }
+        update = {
+            "$set": {
+                "provider_version_id": version.provider_version_id,
+                "pipeline_run_id": run_id,
+                "documents": [page["id"] for page in pages],
+                "pages": [
+                    ProviderVersionPage(key=page["key"], hash=page["hash"]).model_dump()
+                    for page in pages
+                ],
+                "base_version": base_version,
+                "processed_at": datetime.utcnow(),
+            }
+        }
+
+        try:
+            await collection.update_one(key, update, upsert=True)
+        except DuplicateKeyError:
+            # MongoDB до 4.2 не повторяет upsert сам: документ уже вставил параллельный запуск, обновляем его
+            await collection.update_one(key, update)
 
-        for document_id in documents:
-            url = f"https://registry.terraform.io/v2/provider-docs/{document_id}"
+    async def __fetch_provider_docs(self, version: ProviderVersion) -> list[ProviderDoc]:
+        payload = await self.__registry_client.get_provider_version(
+            version.provider_version_id, include=_PROVIDER_DOCS_INCLUDE
+        )
 
-            async with session.get(url) as response:
-                response.raise_for_status()
-                payload = await response.json()
+        provider_docs: list[ProviderDoc] = []
+        seen_keys = set[str]()
+
+        for item in payload.get("included", []):
+            if item.get("type") != _PROVIDER_DOCS_INCLUDE or item.get("id") is None:
+                continue
+
+            attributes = item.get("attributes", {})
+            provider_doc = ProviderDoc(
+                id=str(item["id"]),
+                category=attributes.get("category") or "unknown",
+                slug=attributes.get("slug") or str(item["id"]),
+                title=attributes.get("title"),
+                subcategory=attributes.get("subcategory"),
+                language=attributes.get("language"),
+            )
 
-            content = payload.get("data", {}).get("attributes", {}).get("content", "")
+            if provider_doc.key in seen_keys:
+                self._logger.warning(
+                    "Duplicate page key %s in %s %s, falling back to document id",
+                    provider_doc.key,
+                    version.provider.slug,
+                    version.version,
+                )
+                provider_doc.slug = f"{provider_doc.slug}#{provider_doc.id}"
 
-            file_path = destination / f"{document_id}.md"
-            file_path.write_text(content)
-            downloaded.append(document_id)
+            seen_keys.add(provider_doc.key)
+            provider_docs.append(provider_doc)
 
-        return downloaded
+        return provider_docs
 
-    def __combine_documents(
+    async def __download_documents(
         self,
         *,
-        provider_version: ProviderVersion,
-        document_ids: list[str],
-        source_dir: Path,
-        destination_dir: Path,
-    ) -> Path:
-        combined_path = destination_dir / (
-            f"{provider_version.provider.namespace}_"
-            f"{provider_version.provider.name}_{provider_version.version}.md"
+        version: ProviderVersion,
+        documents: list[ProviderDoc],
+        combined_path: Path | None,
+    ) -> tuple[list[PageManifestEntry], list[PageSpan]]:
+        """
+        Скачивает страницы параллельно и дописывает их в объединённый файл по мере поступления
+        в исходном порядке. Число скачанных, но ещё не записанных страниц ограничено окном,
+        поэтому память не зависит от размера провайдера.
+        Страницы сохраняются в PageStore, а страницы из манифеста версии берутся оттуда без запроса.
+        """
+
+        known_hashes = {
+            entry["id"]: entry["hash"]
+            for entry in await self.__page_store.load_manifest(version.workspace_name)
+            or []
+        }
+
+        concurrency = self.__settings.registry.download_concurrency
+        semaphore = Semaphore(concurrency)
+        window = Semaphore(concurrency * _COMBINE_WINDOW_FACTOR)
+        pending: Queue[Task[tuple[str, str]] | None] = Queue()
+
+        async def download(document_id: str) -> tuple[str, str]:
+            if document_id in known_hashes:
+                stored = await self.__page_store.get(known_hashes[document_id])
+                if stored is not None:
+                    return stored, known_hashes[document_id]
+
+            async with semaphore:
+                payload = await self.__registry_client.get_provider_doc(document_id)
+
+            content = payload.get("data", {}).get("attributes", {}).get("content", "")
+            return content, await self.__page_store.put(content)
+
+        async def schedule_downloads() -> None:
+            for document in documents:
+                await window.acquire()
+                await pending.put(create_task(download(document.id)))
+
+            await pending.put(None)
+
+        self._logger.info(
+            "Downloading %d documents (concurrency=%d, already stored=%d)...",
+            len(documents),
+            concurrency,
+            len(known_hashes),
         )
 
-        combined_content = []
-        for document_id in document_ids:
-            document_path = source_dir / f"{document_id}.md"
-            if document_path.exists():
-                combined_content.append(document_path.read_text())
+        scheduler = create_task(schedule_downloads())
+        manifest: list[PageManifestEntry] = []
 
-        combined_path.write_text("\n\n".join(combined_content))
-        return combined_path
+        try:
+            async with AsyncExitStack() as stack:
+                combined = (
+                    await stack.enter_async_context(_CombinedDocumentWriter(combined_path))
+                    if combined_path is not None
+                    else None
+                )
 
-    async def __run_kdctl_prepare(
-        self,
-        *,
-        input_path: Path,
-        output_dir: Path,
-        metadata: dict[str, str],
-    ) -> None:
-        command = [
-            "python3.13",
-            "-m",
-            "src.kdctl.main",
-            "documents-prepare",
-            "--api-key",
-            self.__settings.app.openai_api_key,
-            "--input",
-            str(input_path),
-            "--output",
-            str(output_dir),
-            "--metadata",
-            json.dumps(metadata),
-        ]
+                while (task := await pending.get()) is not None:
+                    content, content_hash = await task
+                    window.release()
 
-        if self.__settings.app.llm_base_url:
-            command.extend(["--base-url", self.__settings.app.llm_base_url])
+                    document = documents[len(manifest)]
+                    if combined is not None:
+                        await combined.write_page(document.key, content)
 
-        await self.__run_command(command)
+                    manifest.append(
+                        {"id": document.id, "key": document.key, "hash": content_hash}
+                    )
+        finally:
+            scheduler.cancel()
+            while not pending.empty():
+                if (task := pending.get_nowait()) is not None:
+                    task.cancel()
 
-    async def __run_kdctl_vectorize(
+        await self.__page_store.save_manifest(version.workspace_name, manifest)
+
+        return manifest, combined.spans if combined is not None else []
+
+    async def __save_pages_input(
         self,
         *,
-        input_dir: Path,
-        output_dir: Path,
+        pages: list[PageManifestEntry],
+        documents: list[ProviderDoc],
+        path: Path,
     ) -> None:
-        command = [
-            "python3.13",
-            "-m",
-            "src.kdctl.main",
-            "documents-vectorize",
-            "--api-key",
-            self.__settings.app.openai_api_key,
-            "--model",
-            self.__settings.app.model_name,
-            "--input",
-            str(input_dir),
-            "--output",
-            str(output_dir),
-        ]
-
-        if self.__settings.app.llm_base_url:
-            command.extend(["--base-url", self.__settings.app.llm_base_url])
-
-        await self.__run_command(command)
-
-    async def __run_kdctl_upload(self, *, input_dir: Path) -> None:
-        command = [
-            "python3.13",
-            "-m",
-            "src.kdctl.main",
-            "documents-upload",
-            "--host",
-            self.__settings.db_qdrant.address,
-            "--port",
-            str(self.__settings.db_qdrant.port),
-            "--password",
-            self.__settings.db_qdrant.password,
-            "--collection",
-            self.__settings.app.vector_database_collection,
-            "--input",
-            str(input_dir),
-        ]
-
-        if self.__settings.db_qdrant.secured:
-            command.append("--secured")
+        """Список страниц для постраничной подготовки: файл в хранилище страниц и метаданные Registry"""
+
+        documents_by_id = {document.id: document for document in documents}
+        page_inputs: list[PageInput] = []
+
+        for page in pages:
+            document = documents_by_id[page["id"]]
+            page_inputs.append(
+                {
+                    "key": page["key"],
+                    "path": str(self.__page_store.object_path(page["hash"]).resolve()),
+                    "metadata": {
+                        name: value
+                        for name, value in (
+                            ("category", document.category),
+                            ("subcategory", document.subcategory),
+                            ("title", document.title),
+                            ("slug", document.slug),
+                        )
+                        if value is not None
+                    },
+                }
+            )
 
-        await self.__run_command(command)
+        await save_json_to_file(path, page_inputs)  # type: ignore[arg-type]
 
-    async def __run_command(self, command: list[str]) -> None:
-        self._logger.debug(f"Executing: {" ".join(command)}")
-        process = await create_subprocess_exec(*command, stdout=PIPE, stderr=PIPE)
-        stdout, stderr = await process.communicate()
+    async def __combine_stored_pages(
+        self, *, pages: list[PageManifestEntry], combined_path: Path
+    ) -> list[PageSpan]:
+        async with _CombinedDocumentWriter(combined_path) as combined:
+            for page in pages:
+                content = await self.__page_store.get(page["hash"])
+                if content is None:
+                    raise RuntimeError(
+                        f"Page {page['key']} ({page['hash']}) is missing in page store"
+                    )
 
-        if stdout:
-            self._logger.debug(stdout.decode())
-        if stderr:
-            self._logger.error(stderr.decode())
+                await combined.write_page(page["key"], content)
 
-        if process.returncode != 0:
-            raise RuntimeError(
-                f"Command {' '.join(command)} failed with code {process.returncode}"
-            )
+        return combined.spans
@@ -1,87 +1,181 @@
-from datetime import datetime
+from asyncio import Semaphore, gather
+from datetime import datetime, timezone
 
 import aiohttp
+from beanie.operators import In
 
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.components.registry.terraform_registry_client import (
+    TerraformRegistryClient,
+)
 from src.documentation_processing.di_tag import DI_TAG
 from src.documentation_processing.models.document import ProviderVersionDocument
-from src.documentation_processing.models.internal import PipelineState, ProviderVersion
+from src.documentation_processing.models.document.projections import (
+    ProviderVersionKey,
+)
+from src.documentation_processing.models.internal import (
+    PipelineState,
+    ProviderConfig,
+    ProviderVersion,
+)
 from src.documentation_processing.nodes.interface.node import INode
+from src.documentation_processing.settings import Settings
 
 _PROVIDER_VERSIONS_INCLUDE = "provider-versions"
+_UNKNOWN_PUBLISHED_AT = datetime.min.replace(tzinfo=timezone.utc)
 
 
 @injectable(container_tags=[DI_TAG])
 class ProviderVersionSelectionNode(LoggerMixin, INode[PipelineState]):
+    def __init__(
+        self, settings: Settings, registry_client: TerraformRegistryClient
+    ) -> None:
+        super().__init__()
+        self.__settings = settings
+        self.__registry_client = registry_client
+
     async def execute(self, state: PipelineState) -> PipelineState:
         self._logger.info("Selecting provider versions...")
         return await self.__execute(state)
 
     async def __execute(self, state: PipelineState) -> PipelineState:
-        selected_versions: list[ProviderVersion] = []
-
-        async with aiohttp.ClientSession() as session:
-            for provider in state.providers:
-                url = (
-                    "https://registry.terraform.io/v2/providers/"
-                    f"{provider.namespace}/{provider.name}?include={_PROVIDER_VERSIONS_INCLUDE}"
+        semaphore = Semaphore(self.__settings.registry.selection_concurrency)
+
+        results = await gather(
+            *(
+                self.__select_provider_versions(provider=provider, semaphore=semaphore)
+                for provider in state.providers
+            )
+        )
+
+        candidates = [version for versions in results for version in versions]
+        processed = await self.__find_processed(candidates)
+
+        state.versions_to_process = []
+        for version in candidates:
+            if version.key in processed:
+                self._logger.info(
+                    "Provider %s already processed for version %s",
+                    version.provider.slug,
+                    version.version,
                 )
+                continue
 
-                async with session.get(url) as response:
-                    response.raise_for_status()
-                    payload = await response.json()
-
-                versions_raw = [
-                    item
-                    for item in payload.get("included", [])
-                    if item.get("type") == _PROVIDER_VERSIONS_INCLUDE
-                ]
-
-                if not versions_raw:
-                    self._logger.warning(
-                        "No versions found for provider %s", provider.slug
-                    )
-                    continue
-
-                latest_version = max(
-                    versions_raw,
-                    key=lambda item: item.get("attributes", {}).get(
-                        "published-at", datetime.min.isoformat()
-                    ),
+            state.versions_to_process.append(version)
+
+        return state
+
+    # noinspection PyMethodMayBeStatic
+    async def __find_processed(
+        self, candidates: list[ProviderVersion]
+    ) -> set[tuple[str, str, str]]:
+        """
+        Одним запросом находит уже обработанные версии среди кандидатов.
+        Условия $in по каждому полю шире точного набора ключей, поэтому результат
+        дополнительно сверяется с кандидатами.
+        """
+
+        if not candidates:
+            return set()
+
+        documents = (
+            await ProviderVersionDocument.find(
+                In(
+                    ProviderVersionDocument.namespace,
+                    list({version.provider.namespace for version in candidates}),
+                ),
+                In(
+                    ProviderVersionDocument.name,
+                    list({version.provider.name for version in candidates}),
+                ),
+                In(
+                    ProviderVersionDocument.version,
+                    list({version.version for version in candidates}),
+                ),
+            )
+            .project(ProviderVersionKey)
+            .to_list()
+        )
+
+        return {
+            (document.namespace, document.name, document.version)
+            for document in documents
+        }
+
+    async def __select_provider_versions(
+        self,
+        *,
+        provider: ProviderConfig,
+        semaphore: Semaphore,
+    ) -> list[ProviderVersion]:
+        """
+        Возвращает backfill_versions самых свежих версий провайдера, от новых к старым.
+        Уже обработанные версии отсеиваются позже, поэтому прерванный backfill
+        продолжается со следующей необработанной версии.
+        """
+
+        try:
+            async with semaphore:
+                payload = await self.__registry_client.get_provider(
+                    provider.namespace,
+                    provider.name,
+                    include=_PROVIDER_VERSIONS_INCLUDE,
+                )
+        except (aiohttp.ClientError, TimeoutError) as error:
+            self._logger.warning(
+                "Skip provider %s due to registry error: %r", provider.slug, error
+            )
+            return []
+
+        versions: list[ProviderVersion] = []
+
+        for item in payload.get("included", []):
+            if item.get("type") != _PROVIDER_VERSIONS_INCLUDE:
+                continue
+
+            attributes = item.get("attributes", {})
+            version_value = attributes.get("version")
+            version_id = item.get("id")
+
+            if version_value is None or version_id is None:
+                self._logger.warning(
+                    "Skip version of provider %s due to missing version metadata",
+                    provider.slug,
+                )
+                continue
+
+            versions.append(
+                ProviderVersion(
+                    provider=provider,
+                    version=version_value,
+                    provider_version_id=str(version_id),
+                    published_at=_parse_published_at(attributes.get("published-at")),
                 )
+            )
 
-                version_value = latest_version.get("attributes", {}).get("version")
-                version_id = latest_version.get("id")
+        if not versions:
+            self._logger.warning("No versions found for provider %s", provider.slug)
+            return []
 
-                if version_value is None or version_id is None:
-                    self._logger.warning(
-                        "Skip provider %s due to missing version metadata",
-                        provider.slug,
-                    )
-                    continue
+        versions.sort(
+            key=lambda version: version.published_at or _UNKNOWN_PUBLISHED_AT,
+            reverse=True,
+        )
 
-                already_processed = await ProviderVersionDocument.find_one(
-                    ProviderVersionDocument.namespace == provider.namespace,
-                    ProviderVersionDocument.name == provider.name,
-                    ProviderVersionDocument.version == version_value,
-                )
+        return versions[: provider.backfill_versions]
 
-                if already_processed is not None:
-                    self._logger.info(
-                        "Provider %s already processed for version %s",
-                        provider.slug,
-                        version_value,
-                    )
-                    continue
-
-                selected_versions.append(
-                    ProviderVersion(
-                        provider=provider,
-                        version=version_value,
-                        provider_version_id=str(version_id),
-                    )
-                )
 
-        state.versions_to_process = selected_versions
-        return state
+def _parse_published_at(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+
+    try:
+        published_at = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+
+    return published_at
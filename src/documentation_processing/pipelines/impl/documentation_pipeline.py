@@ -2,6 +2,10 @@ from uuid import uuid4
 
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
+from src.documentation_processing.components.kdctl.kdctl_runner import KdctlRunner
+from src.documentation_processing.components.registry.terraform_registry_client import (
+    TerraformRegistryClient,
+)
 from src.documentation_processing.models.internal import PipelineState
 from src.documentation_processing.di_tag import DI_TAG
 from src.documentation_processing.nodes.impl.load_provider_settings_node import (
@@ -23,8 +27,12 @@ class DocumentationPipeline(LoggerMixin, IPipeline[None, PipelineState, None]):
         load_provider_settings_node: LoadProviderSettingsNode,
         provider_version_selection_node: ProviderVersionSelectionNode,
         process_provider_version_node: ProcessProviderVersionNode,
+        registry_client: TerraformRegistryClient,
+        kdctl_runner: KdctlRunner,
     ) -> None:
         super().__init__()
+        self.__registry_client = registry_client
+        self.__kdctl_runner = kdctl_runner
         self.__load_provider_settings_node = load_provider_settings_node
         self.__provider_version_selection_node = provider_version_selection_node
         self.__process_provider_version_node = process_provider_version_node
@@ -40,6 +48,8 @@ class DocumentationPipeline(LoggerMixin, IPipeline[None, PipelineState, None]):
 
     async def __execute(self, input: None) -> None:  # noqa: A002
         state = self._convert_input_to_state(input)
+        self.__registry_client.reset_stats()
+        self.__kdctl_runner.reset_stats()
 
         state = await self.__load_provider_settings_node.execute(state)
         state = await self.__provider_version_selection_node.execute(state)
@@ -48,3 +58,5 @@ class DocumentationPipeline(LoggerMixin, IPipeline[None, PipelineState, None]):
         self._logger.info(
             "Documentation pipeline finished for run %s", state.run_id
         )
+        self._logger.info("Registry client stats: %s", self.__registry_client.stats)
+        self._logger.info("kdctl stats: %s", self.__kdctl_runner.stats)
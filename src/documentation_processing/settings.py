@@ -1,4 +1,5 @@
-from typing import Any
+from pathlib import Path
+from typing import Any, Literal
 
 from pydantic import (
     BaseModel,
@@ -20,9 +21,77 @@ class AppSettings(BaseModel):
     dev_mode: bool = False
     openai_api_key: str = "<NOT_SPECIFIED>"
     model_name: str = "text-embedding-3-large"
+    prepare_model_name: str = "gpt-5-nano"
     llm_base_url: str | None = None
 
 
+class RegistrySettings(BaseModel):
+    base_url: str = "https://registry.terraform.io"
+    download_concurrency: int = 16
+    selection_concurrency: int = 8
+    cache_enabled: bool = True
+    cache_path: Path = Path("src/workspace/documentation_processing/registry_cache.sqlite3")
+    cache_max_size_bytes: int = 1024 * 1024 * 1024
+    rate_limit_per_second: float = 20.0
+    rate_limit_burst: int = 40
+    max_retries: int = 5
+    retry_backoff_base_seconds: float = 0.5
+    retry_backoff_max_seconds: float = 30.0
+    adaptive_concurrency_initial: int = 16
+    adaptive_concurrency_min: int = 2
+    adaptive_concurrency_max: int = 64
+    adaptive_latency_target_seconds: float = 2.0
+
+
+class HttpSettings(BaseModel):
+    limit: int = 128
+    limit_per_host: int = 64
+    keepalive_timeout_seconds: float = 60.0
+    dns_cache_ttl_seconds: int = 300
+    total_timeout_seconds: float = 120.0
+    connect_timeout_seconds: float = 10.0
+    sock_read_timeout_seconds: float = 60.0
+
+
+class ProcessingSettings(BaseModel):
+    page_store_path: Path = Path("src/workspace/documentation_processing/page_store")
+    delta_enabled: bool = True
+    prepare_mode: Literal["combined", "per_page"] = "combined"
+    prepare_page_split_tokens: int = 2000
+    prepare_splitter: Literal["markdown", "llm"] = "markdown"
+    prepare_part_tokens: int = 6000
+    prepare_llm_concurrency: int = 4
+    prepare_llm_max_retries: int = 3
+    prepare_cache_enabled: bool = True
+    prepare_cache_path: Path = Path("src/workspace/documentation_processing/segmentation_cache.sqlite3")
+    prepare_cache_max_size_bytes: int = 512 * 1024 * 1024
+    vectorize_follow: bool = False
+    vectorize_batch_size: int = 256
+    vectorize_batch_tokens: int = 100_000
+    vectorize_max_retries: int = 3
+    vectorize_max_concurrency: int = 4
+    vectorize_memory_budget_bytes: int = 256 * 1024 * 1024
+    vectorize_format: Literal["json", "npy"] = "npy"
+    vectorize_dtype: Literal["float32", "float16"] = "float32"
+    vectorize_cache_enabled: bool = True
+    vectorize_cache_path: Path = Path("src/workspace/documentation_processing/embedding_cache.sqlite3")
+    vectorize_cache_max_size_bytes: int = 2 * 1024 * 1024 * 1024
+    version_concurrency: int = 6
+    # Слот провайдера держится до конца загрузки версии: следующая версия провайдера считает дельту
+    # только после того, как предыдущая записана как обработанная. Поэтому при 1 стадии конвейера
+    # пересекаются только у версий разных провайдеров; при большем значении версии одного провайдера
+    # тоже идут конвейером, но дельта считается относительно более старой версии
+    provider_version_concurrency: int = 1
+    download_stage_concurrency: int = 2
+    prepare_stage_concurrency: int = 2
+    vectorize_stage_concurrency: int = 2
+    upload_stage_concurrency: int = 1
+    stage_queue_size: int = 1
+    kdctl_mode: Literal["in_process", "subprocess", "worker_pool"] = "in_process"
+    kdctl_workers: int = 4
+    kdctl_stall_warning_seconds: float = 300.0
+
+
 class MongoDatabaseSettings(BaseSettings):
     user: str = "dpb_app"
     name: str = "dpb_app"
@@ -67,5 +136,8 @@ class Settings(BaseSettings):
     )
 
     app: AppSettings = AppSettings()
+    http: HttpSettings = HttpSettings()
+    registry: RegistrySettings = RegistrySettings()
+    processing: ProcessingSettings = ProcessingSettings()
     db_mongo: MongoDatabaseSettings = MongoDatabaseSettings()
     db_qdrant: QdrantDatabaseSettings = QdrantDatabaseSettings()
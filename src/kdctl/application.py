@@ -31,3 +31,5 @@ class Application(LoggerMixin, IRunnable):
             self._logger.error(
                 f"Captured error {traceback.format_exception_only(error)}: {error}"
             )
+            # Ненулевой код нужен вызывающему процессу, чтобы отличить сбой от успешного выполнения
+            raise SystemExit(1) from error
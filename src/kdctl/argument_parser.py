@@ -4,6 +4,14 @@ from src.common.dependency_injection.injectable import (
     injectable,
 )
 from src.kdctl.commands.commands_mapping import CommandName
+from src.kdctl.commands.impl.documents_prepare_command import (
+    DEFAULT_SEGMENTATION_CACHE_MAX_SIZE_BYTES,
+    DEFAULT_SEGMENTATION_CACHE_PATH,
+)
+from src.kdctl.commands.impl.documents_vectorize_command import (
+    DEFAULT_EMBEDDING_CACHE_MAX_SIZE_BYTES,
+    DEFAULT_EMBEDDING_CACHE_PATH,
+)
 
 
 @injectable(container_tags=["KDCTL"])
@@ -14,8 +22,8 @@ class ApplicationArgumentParser:
         self.__parser = ArgumentParser("Knowledge database controller.")
         self.__prepare_commands_parsers()
 
-    def parse_args(self) -> Namespace:
-        return self.__parser.parse_args()
+    def parse_args(self, args: list[str] | None = None) -> Namespace:
+        return self.__parser.parse_args(args)
 
     def __prepare_commands_parsers(self) -> None:
         subparsers = self.__parser.add_subparsers(help="Available commands")
@@ -43,6 +51,22 @@ class ApplicationArgumentParser:
                 help="Vectorize documents.",
             )
         )
+        self.__prepare_registry_record_command_parser(
+            subparsers.add_parser(
+                name=CommandName.REGISTRY_RECORD,
+                help="Record Terraform Registry responses into fixture archive.",
+            )
+        )
+        self.__prepare_registry_serve_command_parser(
+            subparsers.add_parser(
+                name=CommandName.REGISTRY_SERVE,
+                help="Serve recorded Terraform Registry fixtures locally.",
+            )
+        )
+        subparsers.add_parser(
+            name=CommandName.SERVE,
+            help="Run as long-lived worker accepting JSON-RPC command requests on stdin/stdout.",
+        ).set_defaults(command=CommandName.SERVE)
 
     def __add_llm_args(self, parser: ArgumentParser, default_model: str) -> None:
         parser.add_argument(
@@ -99,6 +123,22 @@ class ApplicationArgumentParser:
             help="Collection of database",
         )
 
+    def __add_vector_format_args(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--format",
+            dest="format",
+            choices=["json", "npy"],
+            default="json",
+            help="Output format: JSON file per document or .npy vector matrices with .jsonl payloads, defaults to json",
+        )
+        parser.add_argument(
+            "--dtype",
+            dest="dtype",
+            choices=["float32", "float16"],
+            default="float32",
+            help="Vector type of npy format, defaults to float32",
+        )
+
     def __prepare_documents_upload_command_parser(self, parser: ArgumentParser) -> None:
         parser.set_defaults(command=CommandName.DOCUMENTS_UPLOAD)
         self.__add_database_args(parser)
@@ -122,6 +162,7 @@ class ApplicationArgumentParser:
             default=".",
             help="Directory where to store downloaded files, defaults to cwd",
         )
+        self.__add_vector_format_args(parser)
 
     def __prepare_documents_prepare_command_parser(
         self, parser: ArgumentParser
@@ -147,6 +188,81 @@ class ApplicationArgumentParser:
             default="{}",
             help="Document metadata in json format",
         )
+        parser.add_argument(
+            "--pages-index",
+            dest="pages_index",
+            default=None,
+            help="JSON file with page boundaries in input file, chunks are tagged with source pages",
+        )
+        parser.add_argument(
+            "--splitter",
+            dest="splitter",
+            choices=["markdown", "llm"],
+            default="markdown",
+            help="How to split input into documents: by markdown headings locally or by LLM, defaults to markdown",
+        )
+        parser.add_argument(
+            "--part-tokens",
+            dest="part_tokens",
+            type=int,
+            default=6000,
+            help="Token budget of a part sent to LLM by llm splitter, defaults to 6000",
+        )
+        parser.add_argument(
+            "--llm-concurrency",
+            dest="llm_concurrency",
+            type=int,
+            default=4,
+            help="Maximum number of concurrent LLM requests of llm splitter, defaults to 4",
+        )
+        parser.add_argument(
+            "--llm-max-retries",
+            dest="llm_max_retries",
+            type=int,
+            default=3,
+            help="Retries of a failed LLM request of llm splitter with exponential backoff, defaults to 3",
+        )
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            default=False,
+            help="Process only parts not done by previous run into the same output directory (llm splitter)",
+        )
+        parser.add_argument(
+            "--per-page",
+            dest="per_page",
+            action="store_true",
+            default=False,
+            help="Input is a JSON list of pages (key, path, metadata), every page is prepared separately",
+        )
+        parser.add_argument(
+            "--page-split-tokens",
+            dest="page_split_tokens",
+            type=int,
+            default=2000,
+            help="With --per-page only pages above this number of tokens are split, defaults to 2000",
+        )
+        parser.add_argument(
+            "--no-cache",
+            dest="cache_enabled",
+            action="store_false",
+            default=True,
+            help="Do not use segmentation cache of llm splitter",
+        )
+        parser.add_argument(
+            "--cache-path",
+            dest="cache_path",
+            default=str(DEFAULT_SEGMENTATION_CACHE_PATH),
+            help=f"SQLite file of segmentation cache, defaults to {DEFAULT_SEGMENTATION_CACHE_PATH}",
+        )
+        parser.add_argument(
+            "--cache-max-size-bytes",
+            dest="cache_max_size_bytes",
+            type=int,
+            default=DEFAULT_SEGMENTATION_CACHE_MAX_SIZE_BYTES,
+            help="Size limit of segmentation cache, least recently used entries are evicted, defaults to 512 MiB",
+        )
 
     def __prepare_documents_vectorize_command_parser(
         self, parser: ArgumentParser
@@ -165,4 +281,176 @@ class ApplicationArgumentParser:
             dest="output",
             default=".",
             help="Directory where to store prepared files, defaults to cwd",
-        )
\ No newline at end of file
+        )
+        parser.add_argument(
+            "--follow",
+            dest="follow",
+            action="store_true",
+            default=False,
+            help="Vectorize documents as they appear in input directory until documents-prepare completion marker",
+        )
+        parser.add_argument(
+            "--follow-idle-timeout",
+            dest="follow_idle_timeout",
+            type=float,
+            default=600.0,
+            help="With --follow fail if no new documents and no completion marker appear for this many seconds",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=256,
+            help="Maximum number of documents in one embeddings request, defaults to 256",
+        )
+        parser.add_argument(
+            "--batch-tokens",
+            dest="batch_tokens",
+            type=int,
+            default=100_000,
+            help="Maximum total tokens of documents in one embeddings request, defaults to 100000",
+        )
+        parser.add_argument(
+            "--max-retries",
+            dest="max_retries",
+            type=int,
+            default=3,
+            help="How many times to retry a failed embeddings request, defaults to 3",
+        )
+        parser.add_argument(
+            "--max-concurrency",
+            dest="max_concurrency",
+            type=int,
+            default=4,
+            help="Maximum number of embeddings requests in flight, defaults to 4",
+        )
+        parser.add_argument(
+            "--memory-budget-bytes",
+            dest="memory_budget_bytes",
+            type=int,
+            default=256 * 1024 * 1024,
+            help="Approximate limit of memory held by documents and vectors being processed, defaults to 256 MiB",
+        )
+        self.__add_vector_format_args(parser)
+        parser.add_argument(
+            "--no-cache",
+            dest="cache_enabled",
+            action="store_false",
+            default=True,
+            help="Do not use embedding cache",
+        )
+        parser.add_argument(
+            "--cache-path",
+            dest="cache_path",
+            default=str(DEFAULT_EMBEDDING_CACHE_PATH),
+            help=f"SQLite file of embedding cache, defaults to {DEFAULT_EMBEDDING_CACHE_PATH}",
+        )
+        parser.add_argument(
+            "--cache-max-size-bytes",
+            dest="cache_max_size_bytes",
+            type=int,
+            default=DEFAULT_EMBEDDING_CACHE_MAX_SIZE_BYTES,
+            help="Size limit of embedding cache, least recently used entries are evicted, defaults to 2 GiB",
+        )
+
+    def __prepare_registry_record_command_parser(self, parser: ArgumentParser) -> None:
+        parser.set_defaults(command=CommandName.REGISTRY_RECORD)
+        parser.add_argument(
+            "--providers",
+            dest="providers",
+            required=True,
+            help="Comma separated providers to record, for example 'hashicorp/aws,hashicorp/google'",
+        )
+        parser.add_argument(
+            "--versions",
+            dest="versions",
+            type=int,
+            default=1,
+            help="Number of newest versions to record per provider, defaults to 1",
+        )
+        parser.add_argument(
+            "--base-url",
+            dest="base_url",
+            default="https://registry.terraform.io",
+            help="Base URL of registry, defaults to 'https://registry.terraform.io'",
+        )
+        parser.add_argument(
+            "--concurrency",
+            dest="concurrency",
+            type=int,
+            default=8,
+            help="Maximum number of simultaneous requests, defaults to 8",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            dest="output",
+            default=".",
+            help="Directory where to store fixture archive, defaults to cwd",
+        )
+
+    def __prepare_registry_serve_command_parser(self, parser: ArgumentParser) -> None:
+        parser.set_defaults(command=CommandName.REGISTRY_SERVE)
+        parser.add_argument(
+            "--input",
+            "-i",
+            dest="input",
+            default=".",
+            help="Directory with fixture archive, defaults to cwd",
+        )
+        parser.add_argument(
+            "--host",
+            dest="host",
+            default="127.0.0.1",
+            help="Host to listen on, defaults to '127.0.0.1'",
+        )
+        parser.add_argument(
+            "--port",
+            "-p",
+            dest="port",
+            type=int,
+            default=8085,
+            help="Port to listen on, defaults to 8085",
+        )
+        parser.add_argument(
+            "--latency-ms",
+            dest="latency_ms",
+            type=float,
+            default=0.0,
+            help="Base response latency in milliseconds, defaults to 0",
+        )
+        parser.add_argument(
+            "--jitter-ms",
+            dest="jitter_ms",
+            type=float,
+            default=0.0,
+            help="Uniform latency jitter in milliseconds, defaults to 0",
+        )
+        parser.add_argument(
+            "--error-rate",
+            dest="error_rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with 503, defaults to 0",
+        )
+        parser.add_argument(
+            "--throttle-rate",
+            dest="throttle_rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with 429, defaults to 0",
+        )
+        parser.add_argument(
+            "--retry-after",
+            dest="retry_after",
+            type=int,
+            default=1,
+            help="Retry-After seconds for 429 responses, defaults to 1",
+        )
+        parser.add_argument(
+            "--seed",
+            dest="seed",
+            type=int,
+            default=None,
+            help="Random seed for reproducible latency and error injection",
+        )
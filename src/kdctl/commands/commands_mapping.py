@@ -16,6 +16,9 @@ from src.kdctl.commands.impl.documents_upload_command import (
 from src.kdctl.commands.impl.documents_vectorize_command import (
     DocumentsVectorizeCommand,
 )
+from src.kdctl.commands.impl.registry_record_command import RegistryRecordCommand
+from src.kdctl.commands.impl.registry_serve_command import RegistryServeCommand
+from src.kdctl.commands.impl.serve_command import ServeCommand
 from src.kdctl.commands.interface.command import ICommand
 
 
@@ -24,6 +27,9 @@ class CommandName(StrEnum):
     DOCUMENTS_DOWNLOAD = "documents-download"
     DOCUMENTS_PREPARE = "documents-prepare"
     DOCUMENTS_VECTORIZE = "documents-vectorize"
+    REGISTRY_RECORD = "registry-record"
+    REGISTRY_SERVE = "registry-serve"
+    SERVE = "serve"
 
 
 type _CommandFactory = Callable[..., ICommand]
@@ -38,6 +44,9 @@ class CommandsFactoryMapping(dict[CommandName, _CommandFactory]):
                 CommandName.DOCUMENTS_DOWNLOAD: self.__documents_download_command_factory,
                 CommandName.DOCUMENTS_PREPARE: self.__documents_prepare_command_factory,
                 CommandName.DOCUMENTS_VECTORIZE: self.__documents_vectorize_command_factory,
+                CommandName.REGISTRY_RECORD: self.__registry_record_command_factory,
+                CommandName.REGISTRY_SERVE: self.__registry_serve_command_factory,
+                CommandName.SERVE: self.__serve_command_factory,
             },
         )
 
@@ -76,3 +85,28 @@ class CommandsFactoryMapping(dict[CommandName, _CommandFactory]):
         ],
     ) -> DocumentsVectorizeCommand:
         return documents_vectorize_command
+
+    @inject
+    def __registry_record_command_factory(
+        self,
+        registry_record_command: RegistryRecordCommand = Provide[
+            "registry_record_command"
+        ],
+    ) -> RegistryRecordCommand:
+        return registry_record_command
+
+    @inject
+    def __registry_serve_command_factory(
+        self,
+        registry_serve_command: RegistryServeCommand = Provide[
+            "registry_serve_command"
+        ],
+    ) -> RegistryServeCommand:
+        return registry_serve_command
+
+    @inject
+    def __serve_command_factory(
+        self,
+        serve_command: ServeCommand = Provide["serve_command"],
+    ) -> ServeCommand:
+        return serve_command
@@ -2,7 +2,7 @@ import asyncio
 from argparse import Namespace
 from dataclasses import dataclass
 from pathlib import Path
-from typing import cast
+from typing import Literal, cast
 
 from qdrant_client import AsyncQdrantClient
 
@@ -12,7 +12,13 @@ from src.common.dependency_injection.injectable import (
 from src.common.logger.logger_mixin import LoggerMixin
 from src.common.utils.fs_utils import save_json_to_file
 from src.kdctl.commands.interface.command import ICommand
-from src.kdctl.types.document import Document, DocumentPayload, Vector
+from src.kdctl.types.document import Document, DocumentPayload, Vector, VectorShardRow
+from src.kdctl.utils.vector_shards import (
+    VECTORS_FILE_SUFFIX,
+    VectorDtype,
+    save_vector_shard,
+    to_vector_matrix,
+)
 
 
 @dataclass
@@ -23,11 +29,14 @@ class _CommandArgs:
     secured: bool
     collection: str
     output_folder_path: Path
+    format: Literal["json", "npy"]
+    dtype: VectorDtype
 
 
 @injectable(container_tags=["KDCTL"])
 class DocumentsDownloadCommand(LoggerMixin, ICommand):
     __BATCH_SIZE = 10
+    __SHARD_SIZE = 1024
 
     async def execute(self, namespace: Namespace) -> None:
         args = self.__extract_args(namespace)
@@ -39,6 +48,8 @@ class DocumentsDownloadCommand(LoggerMixin, ICommand):
         self._logger.info(f"Saving documents into {args.output_folder_path}...")
 
         offset = None
+        shard_documents: list[Document] = []
+        shards = 0
 
         while True:
             documents, next_offset = await client.scroll(
@@ -49,25 +60,61 @@ class DocumentsDownloadCommand(LoggerMixin, ICommand):
                 with_vectors=True,
             )
 
-            await asyncio.gather(
-                *(
-                    self.__save_document(
-                        output_folder_path=args.output_folder_path,
-                        document={
-                            "id": str(document.id),
-                            "payload": cast(DocumentPayload, document.payload),
-                            "vector": cast(Vector, document.vector),
-                        },
+            page: list[Document] = [
+                {
+                    "id": str(document.id),
+                    "payload": cast(DocumentPayload, document.payload),
+                    "vector": cast(Vector, document.vector),
+                }
+                for document in documents
+            ]
+
+            if args.format == "npy":
+                shard_documents.extend(page)
+                if len(shard_documents) >= self.__SHARD_SIZE:
+                    await self.__save_shard(args, shards, shard_documents)
+                    shards += 1
+                    shard_documents = []
+            else:
+                await asyncio.gather(
+                    *(
+                        self.__save_document(
+                            output_folder_path=args.output_folder_path,
+                            document=document,
+                        )
+                        for document in page
                     )
-                    for document in documents
                 )
-            )
 
             if next_offset is None:
                 break
 
             offset = next_offset
 
+        if shard_documents:
+            await self.__save_shard(args, shards, shard_documents)
+
+    async def __save_shard(
+        self, args: _CommandArgs, index: int, documents: list[Document]
+    ) -> None:
+        path = args.output_folder_path / f"documents-{index:05d}{VECTORS_FILE_SUFFIX}"
+        rows: list[VectorShardRow] = [
+            {
+                "id": document["id"],
+                "name": document["payload"]["metadata"]["name"],
+                "payload": document["payload"],
+            }
+            for document in documents
+        ]
+
+        await save_vector_shard(
+            path,
+            rows,
+            to_vector_matrix([document["vector"] or [] for document in documents], args.dtype),
+        )
+
+        self._logger.info(f"Successfully saved {len(documents)} documents into shard '{path}'")
+
     async def __save_document(
         self, output_folder_path: Path, document: Document
     ) -> None:
@@ -89,6 +136,8 @@ class DocumentsDownloadCommand(LoggerMixin, ICommand):
             secured=namespace.secured,
             collection=namespace.collection,
             output_folder_path=Path(namespace.output),
+            format=namespace.format,
+            dtype=namespace.dtype,
         )
 
     def __get_client(self, args: _CommandArgs) -> AsyncQdrantClient:
@@ -1,33 +1,84 @@
 import asyncio
 import json
-import math
 import re
 from argparse import Namespace
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal, cast
 from uuid import uuid4
 
 from langchain.chat_models import BaseChatModel
 from langchain.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field, SecretStr
+from tenacity import AsyncRetrying, RetryCallState, stop_after_attempt, wait_random_exponential
 
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
-from src.common.utils.fs_utils import load_data_from_file, save_json_to_file
-from src.kdctl.commands.impl.documents_download_command import dataclass
+from src.common.utils.fs_utils import (
+    load_data_from_file,
+    load_json_from_file,
+    save_data_to_file,
+)
 from src.kdctl.commands.interface.command import ICommand
+from src.kdctl.components.markdown_splitter import MarkdownSplitter
+from src.kdctl.components.prepare_manifest import PrepareManifest
+from src.kdctl.components.progress_reporter import CommandProgress, ProgressReporter
+from src.kdctl.components.segmentation_cache import SegmentationCache
+from src.kdctl.components.token_partitioner import TextPart, TokenPartitioner
 from src.kdctl.types.document import Document
+from src.kdctl.types.page_index import PageSpan
+from src.kdctl.types.page_input import PageInput
+from src.kdctl.utils.documents import (
+    PREPARE_COMPLETE_MARKER_FILE_NAME,
+    save_document_atomically,
+)
+from src.kdctl.utils.tokens import count_tokens
+
+_FRONT_MATTER_METADATA_KEYS = ("page_title", "subcategory")
+_PAGES_SEPARATOR = "\n\n"
+_SYSTEM_PROMPT = (
+    "You are an expert technical editor specializing in Terraform and cloud infrastructure documentation. "
+    "Your task is to split the following text into logically distinct subdocuments. "
+    "Each subdocument should correspond to a meaningful section that can be read independently. "
+    "Do NOT summarize, simplify, or rephrase. "
+    "Preserve every technical detail, example, and configuration line exactly as in the original. "
+    "Your output must preserve meaning and internal structure while only splitting into sections."
+)
+
+DEFAULT_SEGMENTATION_CACHE_PATH = Path.home() / ".cache" / "kdctl" / "segmentation.sqlite3"
+DEFAULT_SEGMENTATION_CACHE_MAX_SIZE_BYTES = 512 * 1024 * 1024
+_RETRY_BACKOFF_BASE_SECONDS = 1.0
+_RETRY_BACKOFF_MAX_SECONDS = 30.0
 
 
 @dataclass
-class _CommandArgs:
+class DocumentsPrepareArgs:
     input_file_path: Path
     output_folder_path: Path
     api_key: SecretStr
     base_url: str | None
     model: str
-    metadata: dict[str, Any]
+    metadata: dict[str, Any] = field(default_factory=dict)
+    pages_index_path: Path | None = None
+    splitter: Literal["markdown", "llm"] = "markdown"
+    part_tokens: int = 6000
+    llm_concurrency: int = 4
+    llm_max_retries: int = 3
+    resume: bool = False
+    per_page: bool = False
+    page_split_tokens: int = 2000
+    cache_enabled: bool = True
+    cache_path: Path = DEFAULT_SEGMENTATION_CACHE_PATH
+    cache_max_size_bytes: int = DEFAULT_SEGMENTATION_CACHE_MAX_SIZE_BYTES
+
+
+@dataclass
+class _Section:
+    title: str
+    content: str
+    pages: list[str]
+    metadata: dict[str, Any] = field(default_factory=dict)
 
 
 class _Chunk(BaseModel):
@@ -43,38 +94,90 @@ class _SegmentationOutput(BaseModel):
 
 @injectable(container_tags=["KDCTL"])
 class DocumentsPrepareCommand(LoggerMixin, ICommand):
+    def __init__(
+        self,
+        progress_reporter: ProgressReporter,
+        markdown_splitter: MarkdownSplitter,
+        token_partitioner: TokenPartitioner,
+    ) -> None:
+        self.__progress_reporter = progress_reporter
+        self.__markdown_splitter = markdown_splitter
+        self.__token_partitioner = token_partitioner
+
     async def execute(self, namespace: Namespace) -> None:
-        args = self.__extract_args(namespace)
+        await self.run(self.__extract_args(namespace))
+
+    async def run(
+        self, args: DocumentsPrepareArgs, llm: BaseChatModel | None = None
+    ) -> None:
+        """Выполнение с типизированными аргументами, llm можно переиспользовать между вызовами"""
+
         args.output_folder_path.mkdir(exist_ok=True, parents=True)
 
-        llm = self.__get_llm(args)
-        raw_data = await load_data_from_file(args.input_file_path)
+        marker_path = args.output_folder_path / PREPARE_COMPLETE_MARKER_FILE_NAME
+        marker_path.unlink(missing_ok=True)
 
-        chunks = await self.__split_document(text=raw_data, llm=llm)
+        # Токены считаются только при делении через LLM
+        progress = self.__progress_reporter.start(
+            "documents-prepare", model=args.model if args.splitter == "llm" else None
+        )
 
         created_documents_names = set[str]()
 
-        await asyncio.gather(
-            *(
-                self.__save_document(
-                    output_folder_path=args.output_folder_path,
-                    document={
-                        "id": str(uuid4()),
-                        "payload": {
-                            "page_content": chunk.content.strip(),
-                            "metadata": {
-                                "name": self.__normalize_name(chunk.title.strip()),
-                                **args.metadata,
-                            },
-                        },
-                        "vector": None,
-                    },
-                    created_documents_names=created_documents_names,
-                )
-                for chunk in chunks
+        if args.per_page:
+            await self.__prepare_pages(
+                llm=llm,
+                args=args,
+                created_documents_names=created_documents_names,
+                progress=progress,
+            )
+        else:
+            await self.__prepare_file(
+                llm=llm,
+                args=args,
+                created_documents_names=created_documents_names,
+                progress=progress,
             )
+
+        await save_data_to_file(
+            marker_path, json.dumps({"documents": len(created_documents_names)})
+        )
+        progress.finish()
+
+    async def __prepare_file(
+        self,
+        llm: BaseChatModel | None,
+        args: DocumentsPrepareArgs,
+        created_documents_names: set[str],
+        progress: CommandProgress,
+    ) -> None:
+        raw_data = await load_data_from_file(args.input_file_path)
+        pages = (
+            cast(list[PageSpan], await load_json_from_file(args.pages_index_path))
+            if args.pages_index_path is not None
+            else None
         )
 
+        if args.splitter == "llm":
+            await self.__prepare_with_llm(
+                text=raw_data,
+                llm=llm or self.create_llm(args),
+                pages=pages,
+                args=args,
+                created_documents_names=created_documents_names,
+                progress=progress,
+            )
+        else:
+            sections = self.__split_markdown(text=raw_data, pages=pages, progress=progress)
+            progress.set_total(len(sections))
+
+            await self.__save_sections(
+                args=args,
+                sections=sections,
+                created_documents_names=created_documents_names,
+                progress=progress,
+            )
+
     def __normalize_name(self, name: str) -> str:
         name = re.sub(r"\.[a-zA-Z0-9]+$", "", name)
 
@@ -87,99 +190,489 @@ class DocumentsPrepareCommand(LoggerMixin, ICommand):
             .lower()
         )
 
+    async def __save_sections(
+        self,
+        args: DocumentsPrepareArgs,
+        sections: list[_Section],
+        created_documents_names: set[str],
+        progress: CommandProgress,
+    ) -> list[str | None]:
+        return await asyncio.gather(
+            *(
+                self.__save_section(
+                    args=args,
+                    section=section,
+                    created_documents_names=created_documents_names,
+                    progress=progress,
+                )
+                for section in sections
+            )
+        )
+
+    async def __save_section(
+        self,
+        args: DocumentsPrepareArgs,
+        section: _Section,
+        created_documents_names: set[str],
+        progress: CommandProgress,
+    ) -> str | None:
+        """Сохраняет раздел документом и возвращает его имя, если документ создан"""
+
+        document: Document = {
+            "id": str(uuid4()),
+            "payload": {
+                "page_content": section.content.strip(),
+                "metadata": {
+                    "name": self.__normalize_name(section.title.strip()),
+                    **section.metadata,
+                    **args.metadata,
+                    **({"pages": section.pages} if section.pages else {}),
+                },
+            },
+            "vector": None,
+        }
+
+        saved = await self.__save_document(
+            output_folder_path=args.output_folder_path,
+            document=document,
+            created_documents_names=created_documents_names,
+            progress=progress,
+        )
+
+        return document["payload"]["metadata"]["name"] if saved else None
+
     async def __save_document(
         self,
         output_folder_path: Path,
         document: Document,
         created_documents_names: set[str],
-    ) -> None:
+        progress: CommandProgress,
+    ) -> bool:
         name = document["payload"]["metadata"]["name"]
 
         if name in created_documents_names:
             self._logger.warning(
                 f"Document with name='{name}' already created. Possible cause - llm created documents with same name"
             )
-            return
+            progress.error(f"Duplicate document name '{name}'")
+            return False
         else:
             created_documents_names.add(name)
 
-        await save_json_to_file(
-            file_path=output_folder_path / Path(f"{name}.json"),
-            content=document,
-        )
+        await save_document_atomically(output_folder_path / Path(f"{name}.json"), document)
+
+        progress.document_done(document["payload"]["page_content"])
 
         self._logger.info(
             f"Successfully saved document with id='{document['id']}', name='{name}'"
         )
 
-    def __extract_args(self, namespace: Namespace) -> _CommandArgs:
-        return _CommandArgs(
+        return True
+
+    def __extract_args(self, namespace: Namespace) -> DocumentsPrepareArgs:
+        return DocumentsPrepareArgs(
             output_folder_path=Path(namespace.output),
             input_file_path=Path(namespace.input),
             api_key=SecretStr(namespace.api_key),
             base_url=namespace.base_url,
             model=namespace.model,
             metadata=json.loads(namespace.metadata),
+            pages_index_path=(
+                Path(namespace.pages_index) if namespace.pages_index else None
+            ),
+            splitter=namespace.splitter,
+            part_tokens=namespace.part_tokens,
+            llm_concurrency=namespace.llm_concurrency,
+            llm_max_retries=namespace.llm_max_retries,
+            resume=namespace.resume,
+            per_page=namespace.per_page,
+            page_split_tokens=namespace.page_split_tokens,
+            cache_enabled=namespace.cache_enabled,
+            cache_path=Path(namespace.cache_path),
+            cache_max_size_bytes=namespace.cache_max_size_bytes,
         )
 
-    def __get_llm(self, args: _CommandArgs) -> ChatOpenAI:
+    def create_llm(self, args: DocumentsPrepareArgs) -> ChatOpenAI:
         return ChatOpenAI(
             api_key=args.api_key, base_url=args.base_url, model=args.model
         )
 
-    async def __split_document(self, text: str, llm: BaseChatModel) -> list[_Chunk]:
+    def __split_markdown(
+        self, text: str, pages: list[PageSpan] | None, progress: CommandProgress
+    ) -> list[_Section]:
+        """Локальное деление по заголовкам, метаданные страницы берутся из front matter"""
+
+        sections = [
+            _Section(
+                title=section.title,
+                content=section.content,
+                pages=section.pages,
+                metadata=_front_matter_metadata(section.front_matter),
+            )
+            for section in self.__markdown_splitter.split(text, pages)
+        ]
+
+        self._logger.info(f"Split document into {len(sections)} sections by headings")
+        progress.note(f"Split into {len(sections)} sections by headings")
+
+        return sections
+
+    async def __prepare_pages(
+        self,
+        llm: BaseChatModel | None,
+        args: DocumentsPrepareArgs,
+        created_documents_names: set[str],
+        progress: CommandProgress,
+    ) -> None:
         """
-        Splits large documentation into several large chunks and sends them
-        in parallel to LLM with structured output to produce semantically
-        segmented subdocuments. No summarization or simplification allowed.
+        Готовит каждую страницу из списка отдельно: страница не больше args.page_split_tokens токенов
+        становится одним документом, а большие страницы делятся выбранным способом.
+        Метаданные страницы из Registry переносятся в метаданные её документов.
         """
 
-        system_prompt = (
-            "You are an expert technical editor specializing in Terraform and cloud infrastructure documentation. "
-            "Your task is to split the following text into logically distinct subdocuments. "
-            "Each subdocument should correspond to a meaningful section that can be read independently. "
-            "Do NOT summarize, simplify, or rephrase. "
-            "Preserve every technical detail, example, and configuration line exactly as in the original. "
-            "Your output must preserve meaning and internal structure while only splitting into sections."
+        page_inputs = cast(list[PageInput], await load_json_from_file(args.input_file_path))
+        texts = await asyncio.gather(
+            *(load_data_from_file(Path(page["path"])) for page in page_inputs)
         )
 
-        text_len = len(text)
-        num_parts = max(2, min(6, math.ceil(text_len / 50000)))
-        chunk_size = math.ceil(text_len / num_parts)
+        sections: list[_Section] = []
+        large_pages: list[tuple[PageInput, str]] = []
+
+        for page, text in zip(page_inputs, texts):
+            if count_tokens(text, args.model) > args.page_split_tokens:
+                large_pages.append((page, text))
+                continue
+
+            front_matter, content = self.__markdown_splitter.parse_front_matter(text)
+            sections.append(
+                _Section(
+                    title=str(
+                        front_matter.get("page_title")
+                        or page["metadata"].get("title")
+                        or page["key"]
+                    ),
+                    content=content,
+                    pages=[page["key"]],
+                    metadata={**_front_matter_metadata(front_matter), **page["metadata"]},
+                )
+            )
 
-        chunks = [text[i : i + chunk_size] for i in range(0, text_len, chunk_size)]
         self._logger.info(
-            f"📚 Splitting document into {len(chunks)} parts for parallel LLM segmentation..."
+            f"Preparing {len(page_inputs)} pages separately, "
+            f"{len(large_pages)} pages above {args.page_split_tokens} tokens are split"
+        )
+        progress.note(
+            f"{len(page_inputs) - len(large_pages)} whole pages, {len(large_pages)} pages to split"
         )
 
+        # Большие страницы склеиваются только в памяти, чтобы переиспользовать деление по индексу страниц
+        large_text, large_spans = _join_pages(large_pages)
+        page_metadata = {page["key"]: page["metadata"] for page, _ in large_pages}
+
+        if large_pages and args.splitter == "llm":
+            progress.set_total(len(sections))
+            await self.__save_sections(
+                args=args,
+                sections=_deduplicate_titles(sections),
+                created_documents_names=created_documents_names,
+                progress=progress,
+            )
+            await self.__prepare_with_llm(
+                text=large_text,
+                llm=llm or self.create_llm(args),
+                pages=large_spans,
+                args=args,
+                created_documents_names=created_documents_names,
+                progress=progress,
+                page_metadata=page_metadata,
+                merge_pages=False,
+            )
+            return
+
+        if large_pages:
+            sections.extend(
+                _Section(
+                    title=section.title,
+                    content=section.content,
+                    pages=section.pages,
+                    metadata={
+                        **_front_matter_metadata(section.front_matter),
+                        **page_metadata[section.pages[0]],
+                    },
+                )
+                for section in self.__markdown_splitter.split(large_text, large_spans)
+            )
+
+        progress.set_total(len(sections))
+        await self.__save_sections(
+            args=args,
+            sections=_deduplicate_titles(sections),
+            created_documents_names=created_documents_names,
+            progress=progress,
+        )
+
+    async def __prepare_with_llm(
+        self,
+        text: str,
+        llm: BaseChatModel,
+        pages: list[PageSpan] | None,
+        args: DocumentsPrepareArgs,
+        created_documents_names: set[str],
+        progress: CommandProgress,
+        page_metadata: dict[str, dict[str, Any]] | None = None,
+        merge_pages: bool = True,
+    ) -> None:
+        """
+        Splits large documentation into chunks of at most args.part_tokens tokens
+        at heading or paragraph boundaries and sends them to LLM with structured
+        output (at most args.llm_concurrency requests at once) to produce semantically
+        segmented subdocuments. No summarization or simplification allowed.
+        Responses are cached on disk by (model, system prompt, chunk text),
+        so unchanged chunks are not sent to LLM again.
+        When page index is given, chunks are cut at page boundaries and every
+        produced subdocument is tagged with the keys of its source pages
+        (and with page_metadata of its page when the chunk comes from a single page).
+        Failed LLM calls are retried with backoff; documents of a chunk are saved as soon
+        as it is segmented and chunk statuses are kept in a manifest in the output folder,
+        so a run with args.resume only processes chunks that are not done yet.
+        """
+
+        chunks = self.__token_partitioner.partition(
+            text,
+            pages,
+            max_tokens=args.part_tokens,
+            model=args.model,
+            merge_pages=merge_pages,
+        )
+        self._logger.info(
+            f"📚 Splitting document into {len(chunks)} parts for parallel LLM segmentation "
+            f"(up to {args.part_tokens} tokens per part, concurrency={args.llm_concurrency})..."
+        )
+
+        manifest = PrepareManifest(
+            args.output_folder_path, chunks, model=args.model, system_prompt=_SYSTEM_PROMPT
+        )
+        if args.resume and await manifest.restore():
+            done = [part for part in manifest.parts if part["status"] == "done"]
+            for part in done:
+                created_documents_names.update(part["documents"])
+
+            self._logger.info(f"Resuming: {len(done)}/{len(chunks)} parts already prepared")
+            progress.note(f"Resuming: {len(done)}/{len(chunks)} parts already prepared")
+        else:
+            if args.resume:
+                self._logger.info("No matching manifest found, preparing all parts")
+            await manifest.save()
+
         structured_llm = llm.with_structured_output(_SegmentationOutput)
+        semaphore = asyncio.Semaphore(args.llm_concurrency)
+        cache = await self.__open_cache(args)
+        cache_hits = 0
+
+        async def segment(chunk: TextPart, idx: int) -> tuple[_SegmentationOutput, int]:
+            nonlocal cache_hits
+
+            cache_key = SegmentationCache.make_key(args.model, _SYSTEM_PROMPT, chunk.text)
+            cached = await self.__load_cached(cache, cache_key)
+            if cached is not None:
+                cache_hits += 1
+                return cached, 0
 
-        async def process_chunk(chunk: str, idx: int) -> list[_Chunk]:
             messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=chunk),
+                SystemMessage(content=_SYSTEM_PROMPT),
+                HumanMessage(content=chunk.text),
             ]
+            retrying = AsyncRetrying(
+                stop=stop_after_attempt(args.llm_max_retries + 1),
+                wait=wait_random_exponential(
+                    multiplier=_RETRY_BACKOFF_BASE_SECONDS, max=_RETRY_BACKOFF_MAX_SECONDS
+                ),
+                before_sleep=lambda retry_state: self.__before_retry_sleep(
+                    retry_state, idx, len(chunks)
+                ),
+                reraise=True,
+            )
+
+            async for attempt in retrying:
+                with attempt:
+                    # Слот занимается только на время запроса, ожидание повтора его не держит
+                    async with semaphore:
+                        self._logger.info(f"Sending chunk {idx + 1}/{len(chunks)} to LLM...")
+                        response = await structured_llm.ainvoke(messages)
+                    output = _SegmentationOutput.model_validate(response)
+
+            await self.__store_cached(cache, cache_key, output)
+            return output, attempt.retry_state.attempt_number
+
+        async def process_chunk(chunk: TextPart, idx: int) -> bool:
+            state = manifest.parts[idx]
+            if state["status"] == "done":
+                return True
 
-            self._logger.info(f"Sending chunk {idx + 1}/{len(chunks)} to LLM...")
             try:
-                response = await structured_llm.ainvoke(messages)
-                model = _SegmentationOutput.model_validate(response)
-                self._logger.info(
-                    f"Chunk {idx + 1} processed: {len(model.documents)} sections."
-                )
-                return model.documents
+                output, attempts = await segment(chunk, idx)
             except Exception as e:
                 self._logger.warning(f"LLM failed on chunk {idx + 1}: {e}")
-                return []
+                progress.error(f"LLM failed on part {idx + 1}/{len(chunks)}: {e}")
+                await manifest.update(
+                    idx,
+                    {
+                        **state,
+                        "status": "failed",
+                        "attempts": state["attempts"] + args.llm_max_retries + 1,
+                        "error": str(e),
+                    },
+                )
+                return False
 
-        results = await asyncio.gather(
-            *(process_chunk(chunk, i) for i, chunk in enumerate(chunks))
-        )
+            self._logger.info(f"Chunk {idx + 1} processed: {len(output.documents)} sections.")
+            progress.note(
+                f"Part {idx + 1}/{len(chunks)} segmented into {len(output.documents)} sections"
+            )
+
+            names = await asyncio.gather(
+                *(
+                    self.__save_section(
+                        args=args,
+                        section=_Section(
+                            title=document.title,
+                            content=document.content,
+                            pages=chunk.pages,
+                            metadata=(
+                                page_metadata.get(chunk.pages[0], {})
+                                if page_metadata and len(chunk.pages) == 1
+                                else {}
+                            ),
+                        ),
+                        created_documents_names=created_documents_names,
+                        progress=progress,
+                    )
+                    for document in output.documents
+                )
+            )
+
+            await manifest.update(
+                idx,
+                {
+                    **state,
+                    "status": "done",
+                    "attempts": state["attempts"] + attempts,
+                    "error": None,
+                    "documents": [name for name in names if name is not None],
+                },
+            )
+            return True
 
-        all_docs: list[_Chunk] = [doc for part in results for doc in part]
+        try:
+            results = await asyncio.gather(
+                *(process_chunk(chunk, i) for i, chunk in enumerate(chunks))
+            )
+        finally:
+            if cache is not None:
+                await cache.destroy()
+
+        progress.set_total(len(created_documents_names))
+        failed = results.count(False)
 
         self._logger.info(
-            f"Successfully segmented total {len(all_docs)} logical subdocuments."
+            f"Segmented {len(chunks) - failed}/{len(chunks)} parts into "
+            f"{len(created_documents_names)} logical subdocuments "
+            f"({cache_hits}/{len(chunks)} parts from cache)."
+        )
+        if cache is not None:
+            progress.note(f"{cache_hits}/{len(chunks)} parts served from segmentation cache")
+
+        if failed:
+            raise RuntimeError(
+                f"Segmentation failed for {failed}/{len(chunks)} parts, "
+                f"rerun with --resume to process only them"
+            )
+
+    def __before_retry_sleep(
+        self, retry_state: RetryCallState, idx: int, total: int
+    ) -> None:
+        delay = retry_state.next_action.sleep if retry_state.next_action else 0.0
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+
+        self._logger.warning(
+            f"LLM failed on chunk {idx + 1}/{total} ({error}), "
+            f"attempt {retry_state.attempt_number}, retrying in {delay:.2f}s..."
         )
 
-        return all_docs
+    async def __open_cache(self, args: DocumentsPrepareArgs) -> SegmentationCache | None:
+        if not args.cache_enabled:
+            return None
+
+        cache = SegmentationCache(
+            path=args.cache_path, max_size_bytes=args.cache_max_size_bytes
+        )
+        try:
+            await cache.run()
+        except Exception as error:
+            self._logger.warning(
+                f"Cant open segmentation cache '{args.cache_path}', continuing without it: {error}"
+            )
+            return None
+
+        return cache
+
+    async def __load_cached(
+        self, cache: SegmentationCache | None, key: str
+    ) -> _SegmentationOutput | None:
+        if cache is None:
+            return None
+
+        # Кэш только ускоряет повторные запуски, его сбой не должен ронять подготовку
+        try:
+            raw = await cache.get(key)
+            return _SegmentationOutput.model_validate_json(raw) if raw is not None else None
+        except Exception as error:
+            self._logger.warning(f"Cant read segmentation cache entry: {error}")
+            return None
+
+    async def __store_cached(
+        self, cache: SegmentationCache | None, key: str, output: _SegmentationOutput
+    ) -> None:
+        if cache is None:
+            return
+
+        try:
+            await cache.set(key, output.model_dump_json().encode("utf-8"))
+        except Exception as error:
+            self._logger.warning(f"Cant write segmentation cache entry: {error}")
+
+
+def _front_matter_metadata(front_matter: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: front_matter[key]
+        for key in _FRONT_MATTER_METADATA_KEYS
+        if isinstance(front_matter.get(key), str)
+    }
+
+
+def _join_pages(pages: list[tuple[PageInput, str]]) -> tuple[str, list[PageSpan]]:
+    spans: list[PageSpan] = []
+    position = 0
+
+    for page, text in pages:
+        if spans:
+            position += len(_PAGES_SEPARATOR)
+
+        spans.append({"key": page["key"], "start": position, "end": position + len(text)})
+        position += len(text)
+
+    return _PAGES_SEPARATOR.join(text for _, text in pages), spans
+
+
+def _deduplicate_titles(sections: list[_Section]) -> list[_Section]:
+    """Одинаковые заголовки (например, ресурс и источник данных) получают номер, иначе документы затрут друг друга"""
+
+    used_titles = dict[str, int]()
+
+    for section in sections:
+        count = used_titles.get(section.title, 0) + 1
+        used_titles[section.title] = count
+        if count > 1:
+            section.title = f"{section.title} {count}"
+
+    return sections
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, cast
 
+import numpy as np
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import Distance, VectorParams
@@ -15,11 +16,17 @@ from src.common.dependency_injection.injectable import (
 from src.common.logger.logger_mixin import LoggerMixin
 from src.common.utils.fs_utils import load_json_from_file
 from src.kdctl.commands.interface.command import ICommand
-from src.kdctl.types.document import Document
+from src.kdctl.components.progress_reporter import CommandProgress, ProgressReporter
+from src.kdctl.types.document import Document, VectorShardRow
+from src.kdctl.utils.documents import list_document_files
+from src.kdctl.utils.vector_shards import list_vector_shards, load_vector_shard
+
+# Точек в одном запросе upsert при загрузке шардов
+_SHARD_UPSERT_BATCH_SIZE = 256
 
 
 @dataclass
-class _CommandArgs:
+class DocumentsUploadArgs:
     port: int
     host: str
     password: str
@@ -30,9 +37,18 @@ class _CommandArgs:
 
 @injectable(container_tags=["KDCTL"])
 class DocumentsUploadCommand(LoggerMixin, ICommand):
+    def __init__(self, progress_reporter: ProgressReporter) -> None:
+        self.__progress_reporter = progress_reporter
+
     async def execute(self, namespace: Namespace) -> None:
-        args = self.__extract_args(namespace)
-        client = self.__get_client(args)
+        await self.run(self.__extract_args(namespace))
+
+    async def run(
+        self, args: DocumentsUploadArgs, client: AsyncQdrantClient | None = None
+    ) -> None:
+        """Выполнение с типизированными аргументами, клиент Qdrant можно переиспользовать между вызовами"""
+
+        client = client or self.create_client(args)
 
         if not await client.collection_exists(args.collection):
             await client.create_collection(
@@ -43,24 +59,96 @@ class DocumentsUploadCommand(LoggerMixin, ICommand):
 
         self._logger.info(f"Uploading documents to '{args.host}'")
 
-        file_paths = [
-            file
-            for file in args.input_folder_path.iterdir()
-            if file.is_file() and ".json" in str(file)
-        ]
+        file_paths = list_document_files(args.input_folder_path)
+        shard_paths = list_vector_shards(args.input_folder_path)
 
-        if not file_paths:
+        if not file_paths and not shard_paths:
             self._logger.warning("Directory is empty")
 
+        progress = self.__progress_reporter.start(
+            "documents-upload", total=len(file_paths)
+        )
+
+        shards = [
+            (path, shard)
+            for path in shard_paths
+            if (shard := await self.__open_shard(path, progress)) is not None
+        ]
+        progress.set_total(len(file_paths) + sum(len(rows) for _, (rows, _) in shards))
+
         await asyncio.gather(
             *(
-                self.__upload_document(file_path, client, args.collection)
+                self.__upload_document(file_path, client, args.collection, progress)
                 for file_path in file_paths
-            )
+            ),
+            *(
+                self.__upload_shard(path, rows, vectors, client, args.collection, progress)
+                for path, (rows, vectors) in shards
+            ),
         )
 
+        progress.finish()
+
+    async def __open_shard(
+        self, path: Path, progress: CommandProgress
+    ) -> tuple[list[VectorShardRow], np.ndarray] | None:
+        try:
+            return await load_vector_shard(path)
+        except Exception as error:
+            self._logger.warning(
+                f"Cant read shard '{path}', {traceback.format_exception_only(error)}:{error}"
+            )
+            progress.error(f"Cant read shard '{path}': {error}")
+            return None
+
+    async def __upload_shard(
+        self,
+        path: Path,
+        rows: list[VectorShardRow],
+        vectors: np.ndarray,
+        client: AsyncQdrantClient,
+        collection: str,
+        progress: CommandProgress,
+    ) -> None:
+        self._logger.info(f"Uploading shard '{path}'...")
+
+        for start in range(0, len(rows), _SHARD_UPSERT_BATCH_SIZE):
+            batch = rows[start : start + _SHARD_UPSERT_BATCH_SIZE]
+
+            try:
+                await client.upsert(
+                    collection_name=collection,
+                    points=[
+                        PointStruct(
+                            id=row["id"],
+                            payload=cast(dict[str, Any], row["payload"]),
+                            vector=vector,
+                        )
+                        # Строки отображённой в память матрицы читаются с диска только здесь
+                        for row, vector in zip(
+                            batch, vectors[start : start + len(batch)].tolist()
+                        )
+                    ],
+                )
+            except Exception as error:
+                rows_range = f"rows {start}-{start + len(batch) - 1} of shard '{path}'"
+                self._logger.warning(
+                    f"Cant load {rows_range}, {traceback.format_exception_only(error)}:{error}"
+                )
+                progress.error(f"Cant load {rows_range}: {error}")
+                continue
+
+            for row in batch:
+                progress.document_done(row["payload"]["page_content"])
+
+        self._logger.info(f"Uploaded shard '{path}' successfully")
+
     async def __upload_document(
-        self, path: Path, client: AsyncQdrantClient, collection: str
+        self,
+        path: Path,
+        client: AsyncQdrantClient,
+        collection: str,
+        progress: CommandProgress,
     ) -> None:
         self._logger.info(f"Uploading file '{path}'...")
 
@@ -70,12 +158,14 @@ class DocumentsUploadCommand(LoggerMixin, ICommand):
             self._logger.warning(
                 f"Cant read file '{path}', {traceback.format_exception_only(error)}:{error}"
             )
+            progress.error(f"Cant read file '{path}': {error}")
             return
 
         if data["vector"] is not None:
             vector = data["vector"]
         else:
             self._logger.warning(f"File '{path}', not vectorized.")
+            progress.error(f"File '{path}' not vectorized")
             return
 
         try:
@@ -93,12 +183,14 @@ class DocumentsUploadCommand(LoggerMixin, ICommand):
             self._logger.warning(
                 f"Cant load file '{path}', {traceback.format_exception_only(error)}:{error}"
             )
+            progress.error(f"Cant load file '{path}': {error}")
             return
 
+        progress.document_done(data["payload"]["page_content"])
         self._logger.info(f"Uploaded file '{path}' successfully")
 
-    def __extract_args(self, namespace: Namespace) -> _CommandArgs:
-        return _CommandArgs(
+    def __extract_args(self, namespace: Namespace) -> DocumentsUploadArgs:
+        return DocumentsUploadArgs(
             port=namespace.port,
             host=namespace.host,
             password=namespace.password,
@@ -107,7 +199,7 @@ class DocumentsUploadCommand(LoggerMixin, ICommand):
             input_folder_path=Path(namespace.input),
         )
 
-    def __get_client(self, args: _CommandArgs) -> AsyncQdrantClient:
+    def create_client(self, args: DocumentsUploadArgs) -> AsyncQdrantClient:
         return AsyncQdrantClient(
             port=args.port,
             host=args.host,
@@ -1,85 +1,525 @@
 import asyncio
+import time
 import traceback
 from argparse import Namespace
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import cast
+from typing import Literal, cast
 
+import numpy as np
 from langchain_openai import OpenAIEmbeddings
 from pydantic import SecretStr
+from tenacity import AsyncRetrying, RetryCallState, stop_after_attempt, wait_random_exponential
 
+from src.common.concurrency.byte_budget import ByteBudget
 from src.common.dependency_injection.injectable import injectable
 from src.common.logger.logger_mixin import LoggerMixin
 from src.common.utils.fs_utils import load_json_from_file, save_json_to_file
-from src.kdctl.commands.impl.documents_download_command import dataclass
 from src.kdctl.commands.interface.command import ICommand
-from src.kdctl.types.document import Document
+from src.kdctl.components.embedding_cache import EmbeddingCache
+from src.kdctl.components.progress_reporter import CommandProgress, ProgressReporter
+from src.kdctl.types.document import Document, VectorShardRow
+from src.kdctl.utils.documents import (
+    PREPARE_COMPLETE_MARKER_FILE_NAME,
+    list_document_files,
+)
+from src.kdctl.utils.tokens import count_tokens
+from src.kdctl.utils.vector_shards import (
+    VECTORS_FILE_SUFFIX,
+    VectorDtype,
+    list_vector_shards,
+    remove_vector_shard_sync,
+    save_vector_shard,
+)
+
+_FOLLOW_POLL_INTERVAL_SECONDS = 1.0
+# Лимит модели эмбеддингов на один вход, более длинный текст клиент сам делит на куски
+_MAX_INPUT_TOKENS = 8191
+
+# Оценка памяти под вектор: список float в Python занимает около 32 байт на элемент
+_VECTOR_ITEM_BYTES = 32
+_DEFAULT_DIMENSIONS = 3072
+_RETRY_BACKOFF_BASE_SECONDS = 1.0
+_RETRY_BACKOFF_MAX_SECONDS = 30.0
+# Префикс шардов, которые пишет documents-vectorize; прочие шарды каталога (например, перенесённые) не трогаются
+_SHARD_NAME_PREFIX = "vectors-"
+
+DEFAULT_EMBEDDING_CACHE_PATH = Path.home() / ".cache" / "kdctl" / "embeddings.sqlite3"
+DEFAULT_EMBEDDING_CACHE_MAX_SIZE_BYTES = 2 * 1024 * 1024 * 1024
 
 
 @dataclass
-class _CommandArgs:
+class DocumentsVectorizeArgs:
     input_folder_path: Path
     output_folder_path: Path
     api_key: SecretStr
     base_url: str | None
     model: str
+    follow: bool = False
+    follow_idle_timeout_seconds: float = 600.0
+    batch_size: int = 256
+    batch_tokens: int = 100_000
+    max_retries: int = 3
+    max_concurrency: int = 4
+    memory_budget_bytes: int = 256 * 1024 * 1024
+    format: Literal["json", "npy"] = "json"
+    dtype: VectorDtype = "float32"
+    cache_enabled: bool = True
+    cache_path: Path = DEFAULT_EMBEDDING_CACHE_PATH
+    cache_max_size_bytes: int = DEFAULT_EMBEDDING_CACHE_MAX_SIZE_BYTES
+
+
+@dataclass
+class _PendingDocument:
+    path: Path
+    document: Document
+    tokens: int
+    cache_key: str
+    size_bytes: int
+    # Документы с тем же содержимым, получающие вектор этого документа без отдельного запроса
+    duplicates: list["_PendingDocument"] = field(default_factory=list)
+
+
+@dataclass
+class _VectorizeRun:
+    args: DocumentsVectorizeArgs
+    llm: OpenAIEmbeddings
+    progress: CommandProgress
+    cache: EmbeddingCache | None
+    budget: ByteBudget
+    batches: asyncio.Queue[list[_PendingDocument] | None]
+    # Документы, ждущие вектора в текущем пакете, очереди или запросе, по ключу кэша
+    embedding: dict[str, _PendingDocument] = field(default_factory=dict)
+    batch: list[_PendingDocument] = field(default_factory=list)
+    batch_tokens: int = 0
+    # Векторизованные документы, ещё не записанные в шард (формат npy)
+    shard_rows: list[VectorShardRow] = field(default_factory=list)
+    shard_vectors: list[np.ndarray] = field(default_factory=list)
+    shards: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    requests: int = 0
+    failed_documents: int = 0
 
 
 @injectable(container_tags=["KDCTL"])
 class DocumentsVectorizeCommand(LoggerMixin, ICommand):
+    def __init__(self, progress_reporter: ProgressReporter) -> None:
+        self.__progress_reporter = progress_reporter
+
     async def execute(self, namespace: Namespace) -> None:
-        args = self.__extract_args(namespace)
+        await self.run(self.__extract_args(namespace))
+
+    async def run(
+        self, args: DocumentsVectorizeArgs, llm: OpenAIEmbeddings | None = None
+    ) -> None:
+        """Выполнение с типизированными аргументами, клиент эмбеддингов можно переиспользовать между вызовами"""
+
         args.output_folder_path.mkdir(exist_ok=True, parents=True)
 
         self._logger.info("Vectorizing documents...")
 
-        file_paths = (
-            file
-            for file in args.input_folder_path.iterdir()
-            if file.is_file() and ".json" in str(file)
+        llm = llm or self.create_llm(args)
+        cache = await self.__open_cache(args)
+
+        if args.format == "npy":
+            self.__remove_previous_shards(args.output_folder_path)
+
+        if args.follow:
+            file_paths = []
+            progress = self.__progress_reporter.start("documents-vectorize", model=args.model)
+        else:
+            file_paths = list_document_files(args.input_folder_path)
+            progress = self.__progress_reporter.start(
+                "documents-vectorize", model=args.model, total=len(file_paths)
+            )
+
+        vectorize_run = _VectorizeRun(
+            args=args,
+            llm=llm,
+            progress=progress,
+            cache=cache,
+            budget=ByteBudget(args.memory_budget_bytes),
+            batches=asyncio.Queue(maxsize=args.max_concurrency),
+        )
+        workers = [
+            asyncio.create_task(self.__embed_batches(vectorize_run))
+            for _ in range(args.max_concurrency)
+        ]
+
+        try:
+            if args.follow:
+                await self.__vectorize_following(vectorize_run)
+            else:
+                await self.__enqueue_files(file_paths, vectorize_run)
+
+            await self.__flush_batch(vectorize_run)
+            for _ in workers:
+                await vectorize_run.batches.put(None)
+
+            await asyncio.gather(*workers)
+            await self.__flush_shard(vectorize_run)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+            if cache is not None:
+                await cache.destroy()
+
+        looked_up = vectorize_run.cache_hits + vectorize_run.cache_misses
+        self._logger.info(
+            f"Vectorized with {vectorize_run.requests} embedding requests, "
+            f"cache hits {vectorize_run.cache_hits}/{looked_up}"
+            + (f" ({vectorize_run.cache_hits / looked_up:.0%})" if looked_up else "")
         )
+        if cache is not None:
+            progress.note(f"Embedding cache hits {vectorize_run.cache_hits}/{looked_up}")
+
+        # Пропущенные разделы нельзя молча потерять: версия иначе была бы записана как обработанная
+        if vectorize_run.failed_documents:
+            raise RuntimeError(
+                f"Embedding failed for {vectorize_run.failed_documents} documents "
+                f"after {args.max_retries} retries"
+            )
+
+        progress.finish()
+
+    async def __vectorize_following(self, vectorize_run: _VectorizeRun) -> None:
+        """
+        Векторизует документы по мере их появления во входном каталоге, пока documents-prepare
+        не оставит маркер завершения. Если долго нет ни новых документов, ни маркера, выполнение прерывается.
+        """
+
+        args = vectorize_run.args
+        args.input_folder_path.mkdir(exist_ok=True, parents=True)
+        marker_path = args.input_folder_path / PREPARE_COMPLETE_MARKER_FILE_NAME
+        seen = set[Path]()
+        last_new_at = time.monotonic()
+
+        while True:
+            # Маркер проверяется до просмотра каталога, чтобы не пропустить документы, записанные перед ним
+            completed = marker_path.exists()
+
+            new_paths = [
+                path
+                for path in list_document_files(args.input_folder_path)
+                if path not in seen
+            ]
+            if new_paths:
+                seen.update(new_paths)
+                await self.__enqueue_files(new_paths, vectorize_run)
+                # Неполный пакет отправляется сразу, чтобы не ждать следующих документов prepare
+                await self.__flush_batch(vectorize_run)
+                last_new_at = time.monotonic()
+
+            if completed:
+                break
+
+            if time.monotonic() - last_new_at > args.follow_idle_timeout_seconds:
+                raise RuntimeError(
+                    f"No new documents and no completion marker in '{args.input_folder_path}' "
+                    f"for {args.follow_idle_timeout_seconds:g}s"
+                )
+
+            await asyncio.sleep(_FOLLOW_POLL_INTERVAL_SECONDS)
+
+        vectorize_run.progress.set_total(len(seen))
+
+    async def __enqueue_files(self, paths: list[Path], vectorize_run: _VectorizeRun) -> None:
+        """
+        Читает документы по одному в пределах бюджета памяти: найденные в кэше сразу сохраняются,
+        остальные собираются в пакеты для воркеров. Бюджет освобождается после сохранения документа.
+        """
+
+        for path in paths:
+            size_bytes = self.__estimate_size(path, vectorize_run)
+            await self.__reserve(size_bytes, vectorize_run)
+
+            pending = await self.__load_document(path, size_bytes, vectorize_run)
+            if pending is None:
+                await vectorize_run.budget.release(size_bytes)
+                continue
+
+            waiting = vectorize_run.embedding.get(pending.cache_key)
+            if waiting is not None:
+                vectorize_run.cache_misses += 1
+                waiting.duplicates.append(pending)
+                continue
+
+            vector = await self.__load_cached(vectorize_run.cache, pending.cache_key)
+            if vector is not None:
+                vectorize_run.cache_hits += 1
+                pending.document["vector"] = vector
+                await self.__save_document(pending, vectorize_run)
+                await vectorize_run.budget.release(size_bytes)
+                continue
+
+            vectorize_run.cache_misses += 1
+            vectorize_run.embedding[pending.cache_key] = pending
+            await self.__add_to_batch(pending, vectorize_run)
+
+    # noinspection PyMethodMayBeStatic
+    def __estimate_size(self, path: Path, vectorize_run: _VectorizeRun) -> int:
+        try:
+            file_size = path.stat().st_size
+        except OSError:
+            file_size = 0
+
+        dimensions = vectorize_run.llm.dimensions or _DEFAULT_DIMENSIONS
+        return file_size + dimensions * _VECTOR_ITEM_BYTES
+
+    async def __reserve(self, size_bytes: int, vectorize_run: _VectorizeRun) -> None:
+        budget = vectorize_run.budget
+
+        # Бюджет держат и документы собираемого пакета: если места нет, пакет отправляется,
+        # иначе ожидание освобождения памяти никогда не закончится
+        if budget.used + size_bytes > vectorize_run.args.memory_budget_bytes:
+            await self.__flush_batch(vectorize_run)
+
+        await budget.acquire(size_bytes)
+
+    async def __add_to_batch(self, pending: _PendingDocument, vectorize_run: _VectorizeRun) -> None:
+        """Пакеты не больше args.batch_size документов и args.batch_tokens токенов на запрос"""
+
+        args = vectorize_run.args
+
+        if vectorize_run.batch and (
+            len(vectorize_run.batch) >= args.batch_size
+            or vectorize_run.batch_tokens + pending.tokens > args.batch_tokens
+        ):
+            await self.__flush_batch(vectorize_run)
+
+        vectorize_run.batch.append(pending)
+        vectorize_run.batch_tokens += pending.tokens
+
+    # noinspection PyMethodMayBeStatic
+    async def __flush_batch(self, vectorize_run: _VectorizeRun) -> None:
+        if not vectorize_run.batch:
+            return
+
+        batch = vectorize_run.batch
+        vectorize_run.batch = []
+        vectorize_run.batch_tokens = 0
+
+        await vectorize_run.batches.put(batch)
 
-        llm = self.__get_llm(args)
+    async def __embed_batches(self, vectorize_run: _VectorizeRun) -> None:
+        while (batch := await vectorize_run.batches.get()) is not None:
+            try:
+                await self.__vectorize_batch(batch, vectorize_run)
+            finally:
+                for pending in batch:
+                    vectorize_run.embedding.pop(pending.cache_key, None)
 
-        await asyncio.gather(
-            *(
-                self.__vectorize_document(file_path, args.output_folder_path, llm)
-                for file_path in file_paths
+                    for document in (pending, *pending.duplicates):
+                        await vectorize_run.budget.release(document.size_bytes)
+
+    async def __load_document(
+        self, path: Path, size_bytes: int, vectorize_run: _VectorizeRun
+    ) -> _PendingDocument | None:
+        try:
+            document = cast(Document, await load_json_from_file(path))
+        except Exception as error:
+            self._logger.warning(
+                f"Cant read file '{path}', {traceback.format_exception_only(error)}:{error}"
             )
+            vectorize_run.progress.error(f"Cant read file '{path}': {error}")
+            return None
+
+        content = document["payload"]["page_content"]
+
+        return _PendingDocument(
+            path=path,
+            document=document,
+            tokens=min(count_tokens(content, vectorize_run.args.model), _MAX_INPUT_TOKENS),
+            cache_key=EmbeddingCache.make_key(
+                vectorize_run.args.model, vectorize_run.llm.dimensions, content
+            ),
+            size_bytes=size_bytes,
         )
 
-    async def __vectorize_document(
-        self, path: Path, output_folder_path: Path, llm: OpenAIEmbeddings
+    async def __vectorize_batch(
+        self, batch: list[_PendingDocument], vectorize_run: _VectorizeRun
     ) -> None:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(vectorize_run.args.max_retries + 1),
+            wait=wait_random_exponential(
+                multiplier=_RETRY_BACKOFF_BASE_SECONDS, max=_RETRY_BACKOFF_MAX_SECONDS
+            ),
+            before_sleep=lambda retry_state: self.__before_retry_sleep(retry_state, len(batch)),
+            reraise=True,
+        )
+
         try:
-            data = cast(Document, await load_json_from_file(path))
+            async for attempt in retrying:
+                with attempt:
+                    vectorize_run.requests += 1
+                    vectors = await vectorize_run.llm.aembed_documents(
+                        [pending.document["payload"]["page_content"] for pending in batch],
+                        chunk_size=len(batch),
+                    )
         except Exception as error:
             self._logger.warning(
-                f"Cant read file '{path}', {traceback.format_exception_only(error)}:{error}"
+                f"Cant embed batch of {len(batch)} documents, "
+                f"{traceback.format_exception_only(error)}:{error}"
             )
+            vectorize_run.progress.error(f"Cant embed batch of {len(batch)} documents: {error}")
+            vectorize_run.failed_documents += sum(1 + len(pending.duplicates) for pending in batch)
             return
 
-        data["vector"] = await llm.aembed_query(data["payload"]["page_content"])
+        for pending, vector in zip(batch, vectors):
+            await self.__store_cached(vectorize_run.cache, pending.cache_key, vector)
+            # Дубликаты, прочитанные после этого момента, найдут вектор в кэше
+            vectorize_run.embedding.pop(pending.cache_key, None)
+
+            for document in (pending, *pending.duplicates):
+                document.document["vector"] = vector
+                await self.__save_document(document, vectorize_run)
+
+    def __before_retry_sleep(self, retry_state: RetryCallState, size: int) -> None:
+        delay = retry_state.next_action.sleep if retry_state.next_action else 0.0
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+
+        self._logger.warning(
+            f"Cant embed batch of {size} documents ({error}), "
+            f"attempt {retry_state.attempt_number}, retrying in {delay:.2f}s..."
+        )
+
+    async def __save_document(
+        self, pending: _PendingDocument, vectorize_run: _VectorizeRun
+    ) -> None:
+        path = pending.path
+        data = pending.document
+
+        if vectorize_run.args.format == "npy":
+            await self.__add_to_shard(pending, vectorize_run)
+            return
 
         try:
-            await save_json_to_file(output_folder_path / path.name, data)
+            await save_json_to_file(vectorize_run.args.output_folder_path / path.name, data)
         except Exception as error:
             self._logger.warning(
                 f"Cant write file '{path}', {traceback.format_exception_only(error)}:{error}"
             )
+            vectorize_run.progress.error(f"Cant write file '{path}': {error}")
             return
 
+        vectorize_run.progress.document_done(data["payload"]["page_content"])
         self._logger.info(f"Vectorized file '{path}' successfully")
 
-    def __extract_args(self, namespace: Namespace) -> _CommandArgs:
-        return _CommandArgs(
+    async def __add_to_shard(self, pending: _PendingDocument, vectorize_run: _VectorizeRun) -> None:
+        """
+        Вектор сразу переводится в компактный массив нужного типа, а шард записывается
+        каждые args.batch_size документов, поэтому буфер не выходит за пределы одного пакета.
+        """
+
+        document = pending.document
+        vectorize_run.shard_rows.append(
+            {"id": document["id"], "name": pending.path.stem, "payload": document["payload"]}
+        )
+        vectorize_run.shard_vectors.append(
+            np.asarray(document["vector"], dtype=vectorize_run.args.dtype)
+        )
+
+        if len(vectorize_run.shard_rows) >= vectorize_run.args.batch_size:
+            await self.__flush_shard(vectorize_run)
+
+    async def __flush_shard(self, vectorize_run: _VectorizeRun) -> None:
+        if not vectorize_run.shard_rows:
+            return
+
+        rows = vectorize_run.shard_rows
+        vectors = np.stack(vectorize_run.shard_vectors)
+        vectorize_run.shard_rows = []
+        vectorize_run.shard_vectors = []
+
+        path = vectorize_run.args.output_folder_path / (
+            f"{_SHARD_NAME_PREFIX}{vectorize_run.shards:05d}{VECTORS_FILE_SUFFIX}"
+        )
+        vectorize_run.shards += 1
+
+        try:
+            await save_vector_shard(path, rows, vectors)
+        except Exception as error:
+            self._logger.warning(
+                f"Cant write shard '{path}', {traceback.format_exception_only(error)}:{error}"
+            )
+            vectorize_run.progress.error(f"Cant write shard '{path}': {error}")
+            return
+
+        for row in rows:
+            vectorize_run.progress.document_done(row["payload"]["page_content"])
+
+        self._logger.info(f"Vectorized {len(rows)} documents into shard '{path}' successfully")
+
+    # noinspection PyMethodMayBeStatic
+    def __remove_previous_shards(self, output_folder_path: Path) -> None:
+        """Повторный запуск в тот же каталог заменяет шарды, а не дописывает к ним копии документов"""
+
+        for path in list_vector_shards(output_folder_path):
+            if path.name.startswith(_SHARD_NAME_PREFIX):
+                remove_vector_shard_sync(path)
+
+    async def __open_cache(self, args: DocumentsVectorizeArgs) -> EmbeddingCache | None:
+        if not args.cache_enabled:
+            return None
+
+        cache = EmbeddingCache(path=args.cache_path, max_size_bytes=args.cache_max_size_bytes)
+        try:
+            await cache.run()
+        except Exception as error:
+            self._logger.warning(
+                f"Cant open embedding cache '{args.cache_path}', continuing without it: {error}"
+            )
+            return None
+
+        return cache
+
+    async def __load_cached(self, cache: EmbeddingCache | None, key: str) -> list[float] | None:
+        if cache is None:
+            return None
+
+        # Кэш только экономит запросы, его сбой не должен ронять векторизацию
+        try:
+            value = await cache.get(key)
+            return EmbeddingCache.decode(value) if value is not None else None
+        except Exception as error:
+            self._logger.warning(f"Cant read embedding cache entry: {error}")
+            return None
+
+    async def __store_cached(
+        self, cache: EmbeddingCache | None, key: str, vector: list[float]
+    ) -> None:
+        if cache is None:
+            return
+
+        try:
+            await cache.set(key, EmbeddingCache.encode(vector))
+        except Exception as error:
+            self._logger.warning(f"Cant write embedding cache entry: {error}")
+
+    def __extract_args(self, namespace: Namespace) -> DocumentsVectorizeArgs:
+        return DocumentsVectorizeArgs(
             output_folder_path=Path(namespace.output),
             input_folder_path=Path(namespace.input),
             api_key=SecretStr(namespace.api_key),
             base_url=namespace.base_url,
             model=namespace.model,
+            follow=namespace.follow,
+            follow_idle_timeout_seconds=namespace.follow_idle_timeout,
+            batch_size=namespace.batch_size,
+            batch_tokens=namespace.batch_tokens,
+            max_retries=namespace.max_retries,
+            max_concurrency=namespace.max_concurrency,
+            memory_budget_bytes=namespace.memory_budget_bytes,
+            format=namespace.format,
+            dtype=namespace.dtype,
+            cache_enabled=namespace.cache_enabled,
+            cache_path=Path(namespace.cache_path),
+            cache_max_size_bytes=namespace.cache_max_size_bytes,
         )
 
-    def __get_llm(self, args: _CommandArgs) -> OpenAIEmbeddings:
+    def create_llm(self, args: DocumentsVectorizeArgs) -> OpenAIEmbeddings:
         return OpenAIEmbeddings(
             api_key=args.api_key, base_url=args.base_url, model=args.model
         )
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+from argparse import Namespace
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+
+from src.common.dependency_injection.injectable import (
+    injectable,
+)
+from src.common.logger.logger_mixin import LoggerMixin
+from src.common.utils.fs_utils import save_data_to_file, save_json_to_file
+from src.kdctl.commands.interface.command import ICommand
+from src.kdctl.types.registry_fixture import RegistryFixtureIndex
+
+_PROVIDER_VERSIONS_INCLUDE = "provider-versions"
+_PROVIDER_DOCS_INCLUDE = "provider-docs"
+
+
+@dataclass
+class _CommandArgs:
+    base_url: str
+    providers: list[tuple[str, str]]
+    versions: int
+    concurrency: int
+    output_folder_path: Path
+
+
+@injectable(container_tags=["KDCTL"])
+class RegistryRecordCommand(LoggerMixin, ICommand):
+    """
+    Записывает ответы Terraform Registry для набора провайдеров в локальный архив фикстур:
+    страницу провайдера со списком версий, последние версии со списком страниц документации
+    и сами страницы. Архив воспроизводится командой registry-serve.
+    """
+
+    async def execute(self, namespace: Namespace) -> None:
+        args = self.__extract_args(namespace)
+        (args.output_folder_path / "responses").mkdir(exist_ok=True, parents=True)
+
+        index: RegistryFixtureIndex = {
+            "base_url": args.base_url,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "responses": {},
+        }
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(
+                *(
+                    self.__record_provider(
+                        session=session,
+                        semaphore=semaphore,
+                        args=args,
+                        index=index,
+                        namespace=provider_namespace,
+                        name=provider_name,
+                    )
+                    for provider_namespace, provider_name in args.providers
+                )
+            )
+
+        await save_json_to_file(args.output_folder_path / "index.json", index)  # type: ignore[arg-type]
+
+        self._logger.info(
+            f"Recorded {len(index['responses'])} responses into '{args.output_folder_path}'"
+        )
+
+    async def __record_provider(
+        self,
+        *,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        args: _CommandArgs,
+        index: RegistryFixtureIndex,
+        namespace: str,
+        name: str,
+    ) -> None:
+        self._logger.info(f"Recording provider '{namespace}/{name}'...")
+
+        provider = await self.__record(
+            session=session,
+            semaphore=semaphore,
+            args=args,
+            index=index,
+            path=f"/v2/providers/{namespace}/{name}?include={_PROVIDER_VERSIONS_INCLUDE}",
+        )
+
+        versions = sorted(
+            (
+                item
+                for item in provider.get("included", [])
+                if item.get("type") == _PROVIDER_VERSIONS_INCLUDE
+            ),
+            key=lambda item: item.get("attributes", {}).get("published-at", ""),
+            reverse=True,
+        )[: args.versions]
+
+        for version in versions:
+            provider_version = await self.__record(
+                session=session,
+                semaphore=semaphore,
+                args=args,
+                index=index,
+                path=f"/v2/provider-versions/{version['id']}?include={_PROVIDER_DOCS_INCLUDE}",
+            )
+
+            await asyncio.gather(
+                *(
+                    self.__record(
+                        session=session,
+                        semaphore=semaphore,
+                        args=args,
+                        index=index,
+                        path=f"/v2/provider-docs/{item['id']}",
+                    )
+                    for item in provider_version.get("included", [])
+                    if item.get("type") == _PROVIDER_DOCS_INCLUDE
+                    and f"/v2/provider-docs/{item['id']}" not in index["responses"]
+                )
+            )
+
+            self._logger.info(
+                f"Recorded '{namespace}/{name}' version "
+                f"{version.get('attributes', {}).get('version')}"
+            )
+
+    # noinspection PyMethodMayBeStatic
+    async def __record(
+        self,
+        *,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        args: _CommandArgs,
+        index: RegistryFixtureIndex,
+        path: str,
+    ) -> dict[str, Any]:
+        async with semaphore:
+            async with session.get(f"{args.base_url}{path}") as response:
+                response.raise_for_status()
+                body = await response.text()
+
+        file_name = f"responses/{hashlib.sha256(path.encode()).hexdigest()}.json"
+        await save_data_to_file(args.output_folder_path / file_name, body)
+
+        index["responses"][path] = {
+            "file": file_name,
+            "content_type": response.headers.get("Content-Type"),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+        return json.loads(body)
+
+    # noinspection PyMethodMayBeStatic
+    def __extract_args(self, namespace: Namespace) -> _CommandArgs:
+        return _CommandArgs(
+            base_url=namespace.base_url.rstrip("/"),
+            providers=[
+                (provider_namespace, provider_name)
+                for provider_namespace, _, provider_name in (
+                    provider.strip().partition("/")
+                    for provider in namespace.providers.split(",")
+                    if provider.strip()
+                )
+            ],
+            versions=namespace.versions,
+            concurrency=namespace.concurrency,
+            output_folder_path=Path(namespace.output),
+        )
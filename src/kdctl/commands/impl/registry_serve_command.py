@@ -0,0 +1,128 @@
+import asyncio
+import random
+from argparse import Namespace
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+
+import aiofiles
+from aiohttp import web
+
+from src.common.dependency_injection.injectable import (
+    injectable,
+)
+from src.common.logger.logger_mixin import LoggerMixin
+from src.common.utils.fs_utils import load_json_from_file
+from src.kdctl.commands.interface.command import ICommand
+from src.kdctl.types.registry_fixture import RegistryFixtureIndex
+
+
+@dataclass
+class _CommandArgs:
+    input_folder_path: Path
+    host: str
+    port: int
+    latency_seconds: float
+    jitter_seconds: float
+    error_rate: float
+    throttle_rate: float
+    retry_after: int
+    seed: int | None
+
+
+@injectable(container_tags=["KDCTL"])
+class RegistryServeCommand(LoggerMixin, ICommand):
+    """
+    Локальный сервер, воспроизводящий архив фикстур registry-record вместо Terraform Registry.
+    Задержка, джиттер, доля ответов 503 и 429 (с Retry-After) задаются аргументами,
+    условные запросы по ETag обслуживаются ответом 304.
+    """
+
+    async def execute(self, namespace: Namespace) -> None:
+        args = self.__extract_args(namespace)
+        index = cast(
+            RegistryFixtureIndex,
+            await load_json_from_file(args.input_folder_path / "index.json"),
+        )
+        rng = random.Random(args.seed)
+        stats = Counter[str]()
+
+        async def handle(request: web.Request) -> web.StreamResponse:
+            delay = args.latency_seconds + rng.uniform(
+                -args.jitter_seconds, args.jitter_seconds
+            )
+            await asyncio.sleep(max(0.0, delay))
+
+            roll = rng.random()
+            if roll < args.throttle_rate:
+                stats["throttled"] += 1
+                return web.Response(
+                    status=429, headers={"Retry-After": str(args.retry_after)}
+                )
+            if roll < args.throttle_rate + args.error_rate:
+                stats["errors"] += 1
+                return web.Response(status=503)
+
+            entry = index["responses"].get(request.path_qs)
+            if entry is None:
+                stats["not_found"] += 1
+                return web.Response(status=404)
+
+            headers = {
+                header: value
+                for header, value in (
+                    ("ETag", entry["etag"]),
+                    ("Last-Modified", entry["last_modified"]),
+                )
+                if value is not None
+            }
+
+            if entry["etag"] is not None and (
+                request.headers.get("If-None-Match") == entry["etag"]
+            ):
+                stats["not_modified"] += 1
+                return web.Response(status=304, headers=headers)
+
+            async with aiofiles.open(args.input_folder_path / entry["file"], "rb") as file:
+                body = await file.read()
+
+            stats["served"] += 1
+            return web.Response(
+                body=body,
+                headers={
+                    **headers,
+                    "Content-Type": entry["content_type"] or "application/json",
+                },
+            )
+
+        application = web.Application()
+        application.router.add_get("/{tail:.*}", handle)
+
+        runner = web.AppRunner(application)
+        await runner.setup()
+
+        try:
+            await web.TCPSite(runner, host=args.host, port=args.port).start()
+            self._logger.info(
+                f"Serving {len(index['responses'])} recorded responses of "
+                f"'{index['base_url']}' on http://{args.host}:{args.port}"
+            )
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+            self._logger.info(f"Registry fixture server stopped, stats: {dict(stats)}")
+
+    # noinspection PyMethodMayBeStatic
+    def __extract_args(self, namespace: Namespace) -> _CommandArgs:
+        return _CommandArgs(
+            input_folder_path=Path(namespace.input),
+            host=namespace.host,
+            port=namespace.port,
+            latency_seconds=namespace.latency_ms / 1000,
+            jitter_seconds=namespace.jitter_ms / 1000,
+            error_rate=namespace.error_rate,
+            throttle_rate=namespace.throttle_rate,
+            retry_after=namespace.retry_after,
+            seed=namespace.seed,
+        )
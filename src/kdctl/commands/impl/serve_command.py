@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import traceback
+from argparse import Namespace
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from dependency_injector.wiring import Provide
+
+from src.common.dependency_injection.injectable import (
+    injectable,
+)
+from src.common.logger.logger_mixin import LoggerMixin
+from src.kdctl.commands.interface.command import ICommand
+from src.kdctl.components.progress_reporter import ProgressReporter
+from src.kdctl.types.progress import ProgressEvent
+
+if TYPE_CHECKING:
+    from src.kdctl.argument_parser import ApplicationArgumentParser
+    from src.kdctl.commands.commands_mapping import CommandsFactoryMapping
+
+# Команды, которые можно вызвать через serve; параметры запроса - аргументы командной строки команды
+SERVED_COMMANDS = frozenset(
+    {
+        "documents-upload",
+        "documents-download",
+        "documents-prepare",
+        "documents-vectorize",
+    }
+)
+
+_PARSE_ERROR = -32700
+_INVALID_REQUEST = -32600
+_METHOD_NOT_FOUND = -32601
+_INVALID_PARAMS = -32602
+_COMMAND_ERROR = -32000
+
+# Строки запросов могут содержать метаданные документов, стандартного лимита StreamReader в 64 КиБ мало
+_STDIN_LIMIT = 16 * 1024 * 1024
+
+
+@injectable(container_tags=["KDCTL"])
+class ServeCommand(LoggerMixin, ICommand):
+    """
+    Долгоживущий воркер: принимает JSON-RPC 2.0 запросы построчно из stdin и отвечает в stdout.
+    Метод запроса - имя команды, params - её аргументы командной строки, запросы выполняются по одному.
+    Перед выполнением отправляется уведомление progress со статусом started,
+    события прогресса команды приходят уведомлениями progress с полями ProgressEvent.
+    Всё, что пишется в stdout помимо протокола, перенаправляется в stderr.
+    """
+
+    def __init__(
+        self,
+        parser: "ApplicationArgumentParser" = Provide["application_argument_parser"],
+        commands_mapping: "CommandsFactoryMapping" = Provide["commands_factory_mapping"],
+        progress_reporter: ProgressReporter = Provide["progress_reporter"],
+    ) -> None:
+        self.__parser = parser
+        self.__commands_mapping = commands_mapping
+        self.__progress_reporter = progress_reporter
+
+    async def execute(self, namespace: Namespace) -> None:
+        output = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+        reader = asyncio.StreamReader(limit=_STDIN_LIMIT)
+        await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+
+        self._logger.info(f"Serving kdctl requests (pid={os.getpid()})...")
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+
+            self.__send(output, await self.__handle(line, output))
+
+        self._logger.info("Input closed, stopping")
+
+    async def __handle(self, line: bytes, output: BinaryIO) -> dict[str, Any]:
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            return self.__error(None, _PARSE_ERROR, f"Parse error: {error}")
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return self.__error(None, _INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or []
+
+        if method not in SERVED_COMMANDS:
+            return self.__error(request_id, _METHOD_NOT_FOUND, f"Unknown method '{method}'")
+
+        if not isinstance(params, list) or not all(isinstance(param, str) for param in params):
+            return self.__error(
+                request_id, _INVALID_PARAMS, "Params must be a list of command line arguments"
+            )
+
+        try:
+            namespace = self.__parser.parse_args([method, *params])
+        except SystemExit:
+            return self.__error(request_id, _INVALID_PARAMS, f"Invalid arguments for '{method}'")
+
+        self.__send(
+            output,
+            {
+                "jsonrpc": "2.0",
+                "method": "progress",
+                "params": {"id": request_id, "status": "started"},
+            },
+        )
+
+        started_at = time.monotonic()
+
+        def send_progress(event: ProgressEvent) -> None:
+            self.__send(
+                output,
+                {
+                    "jsonrpc": "2.0",
+                    "method": "progress",
+                    "params": {"id": request_id, **event},
+                },
+            )
+
+        try:
+            with self.__progress_reporter.use_sink(send_progress):
+                await self.__commands_mapping[namespace.command]().execute(namespace)
+        except Exception as error:
+            self._logger.error(
+                f"Captured error {traceback.format_exception_only(error)}: {error}"
+            )
+            return self.__error(request_id, _COMMAND_ERROR, str(error))
+
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {"duration_seconds": time.monotonic() - started_at},
+        }
+
+    # noinspection PyMethodMayBeStatic
+    def __error(self, request_id: Any, code: int, message: str) -> dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": code, "message": message},
+        }
+
+    # noinspection PyMethodMayBeStatic
+    def __send(self, output: BinaryIO, message: dict[str, Any]) -> None:
+        output.write(json.dumps(message).encode() + b"\n")
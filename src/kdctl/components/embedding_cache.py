@@ -0,0 +1,23 @@
+import hashlib
+from array import array
+
+from src.common.cache.sqlite_cache import SqliteCache
+
+
+class EmbeddingCache(SqliteCache):
+    """Дисковый кэш эмбеддингов по содержимому раздела, векторы хранятся как float32"""
+
+    @staticmethod
+    def make_key(model: str, dimensions: int | None, content: str) -> str:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return f"{model}:{dimensions or 'default'}:{content_hash}"
+
+    @staticmethod
+    def encode(vector: list[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def decode(value: bytes) -> list[float]:
+        vector = array("f")
+        vector.frombytes(value)
+        return vector.tolist()
@@ -0,0 +1,208 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+import yaml
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.kdctl.types.page_index import PageSpan
+from src.kdctl.utils.markdown import HEADING_PATTERN, update_fence
+
+_FRONT_MATTER_DELIMITER = re.compile(r"^---[ \t]*$")
+_FRONT_MATTER_KEY_PATTERN = re.compile(r"^[A-Za-z_][\w-]*:")
+_FRONT_MATTER_MAX_LINES = 100
+# Разделы с заголовками этого уровня и выше становятся отдельными документами
+_SPLIT_LEVEL = 2
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass
+class MarkdownSection:
+    title: str
+    content: str
+    pages: list[str] = field(default_factory=list)
+    front_matter: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Page:
+    front_matter: dict[str, Any]
+    lines: list[str]
+    keys: list[str]
+
+
+@dataclass
+class _RawSection:
+    heading: str | None
+    level: int
+    lines: list[str]
+
+    @property
+    def has_body(self) -> bool:
+        body = self.lines[1:] if self.heading is not None else self.lines
+        return any(line.strip() for line in body)
+
+
+@injectable(container_tags=["KDCTL"])
+class MarkdownSplitter(LoggerMixin):
+    """
+    Детерминированно делит Markdown на разделы по заголовкам `#` и `##` без обращения к LLM.
+    YAML front matter в начале страницы разбирается и не попадает в текст разделов,
+    заголовки внутри блоков кода не учитываются. Без индекса страниц страницы распознаются по front matter.
+    """
+
+    def split(self, text: str, pages: list[PageSpan] | None) -> list[MarkdownSection]:
+        units = (
+            [(text[page["start"] : page["end"]], [page["key"]]) for page in pages]
+            if pages
+            else [(text, [])]
+        )
+
+        sections: list[MarkdownSection] = []
+        used_titles = dict[str, int]()
+
+        for unit_text, keys in units:
+            for page in self.__split_pages(unit_text, keys):
+                for section in self.__split_page(page):
+                    # Одинаковые заголовки разделов встречаются на многих страницах, а имя документа должно быть уникальным
+                    count = used_titles.get(section.title, 0) + 1
+                    used_titles[section.title] = count
+                    if count > 1:
+                        section.title = f"{section.title} {count}"
+
+                    sections.append(section)
+
+        return sections
+
+    def parse_front_matter(self, text: str) -> tuple[dict[str, Any], str]:
+        """Отделяет YAML front matter в начале страницы от её текста"""
+
+        lines = text.splitlines()
+        start = next((index for index, line in enumerate(lines) if line.strip()), None)
+
+        if start is None or not _FRONT_MATTER_DELIMITER.match(lines[start]):
+            return {}, text
+
+        parsed = self.__parse_front_matter(lines, start)
+        if parsed is None:
+            return {}, text
+
+        front_matter, end = parsed
+        return front_matter, "\n".join(lines[end:])
+
+    def __split_pages(self, text: str, keys: list[str]) -> list[_Page]:
+        lines = text.splitlines()
+        pages: list[_Page] = []
+        current = _Page(front_matter={}, lines=[], keys=keys)
+        in_fence: str | None = None
+        index = 0
+
+        while index < len(lines):
+            line = lines[index]
+
+            if in_fence is None and _FRONT_MATTER_DELIMITER.match(line):
+                parsed = self.__parse_front_matter(lines, index)
+                if parsed is not None:
+                    front_matter, index = parsed
+                    if any(item.strip() for item in current.lines) or current.front_matter:
+                        pages.append(current)
+                    current = _Page(front_matter=front_matter, lines=[], keys=keys)
+                    continue
+
+            in_fence = update_fence(in_fence, line)
+            current.lines.append(line)
+            index += 1
+
+        if any(line.strip() for line in current.lines) or current.front_matter:
+            pages.append(current)
+
+        return pages
+
+    # noinspection PyMethodMayBeStatic
+    def __parse_front_matter(
+        self, lines: list[str], start: int
+    ) -> tuple[dict[str, Any], int] | None:
+        """Возвращает front matter и индекс строки после него, если с start начинается блок вида `---\\nkey: value\\n---`"""
+
+        end = next(
+            (
+                index
+                for index in range(start + 1, min(len(lines), start + _FRONT_MATTER_MAX_LINES))
+                if _FRONT_MATTER_DELIMITER.match(lines[index])
+            ),
+            None,
+        )
+        if end is None or end == start + 1:
+            return None
+
+        block = lines[start + 1 : end]
+        top_level = [line for line in block if line.strip() and not line[0].isspace()]
+        if not top_level or not all(_FRONT_MATTER_KEY_PATTERN.match(line) for line in top_level):
+            return None
+
+        try:
+            front_matter = yaml.load("\n".join(block), Loader=_YAML_LOADER)
+        except yaml.YAMLError:
+            return None
+
+        if not isinstance(front_matter, dict):
+            return None
+
+        return front_matter, end + 1
+
+    # noinspection PyMethodMayBeStatic
+    def __split_page(self, page: _Page) -> list[MarkdownSection]:
+        raw_sections = [_RawSection(heading=None, level=0, lines=[])]
+        in_fence: str | None = None
+
+        for line in page.lines:
+            if in_fence is None and (match := HEADING_PATTERN.match(line)):
+                level = len(match.group(1))
+                if level <= _SPLIT_LEVEL:
+                    raw_sections.append(
+                        _RawSection(heading=match.group(2).strip(), level=level, lines=[line])
+                    )
+                    continue
+
+            in_fence = update_fence(in_fence, line)
+            raw_sections[-1].lines.append(line)
+
+        page_title = str(
+            page.front_matter.get("page_title")
+            or next(
+                (section.heading for section in raw_sections if section.level == 1),
+                None,
+            )
+            or (page.keys[0] if page.keys else "document")
+        )
+
+        # Заголовок без текста (например, `#` перед первым `##`) присоединяется к следующему разделу
+        merged: list[_RawSection] = []
+        carried: list[str] = []
+        for section in raw_sections:
+            if not section.has_body:
+                carried.extend(section.lines)
+                continue
+
+            section.lines = carried + section.lines
+            carried = []
+            merged.append(section)
+
+        if carried and merged:
+            merged[-1].lines.extend(carried)
+
+        return [
+            MarkdownSection(
+                title=(
+                    page_title
+                    if section.heading is None or section.level == 1
+                    else f"{page_title} {section.heading}"
+                ),
+                content="\n".join(section.lines).strip(),
+                pages=page.keys,
+                front_matter=page.front_matter,
+            )
+            for section in merged
+        ]
+
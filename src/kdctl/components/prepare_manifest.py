@@ -0,0 +1,87 @@
+import hashlib
+import json
+from asyncio import Lock
+from pathlib import Path
+from typing import cast
+
+from src.common.utils.fs_utils import load_json_from_file, save_json_to_file
+from src.kdctl.components.token_partitioner import TextPart
+from src.kdctl.types.prepare_manifest import PrepareManifestData, PreparePartState
+
+# Без ".json" в имени, чтобы documents-vectorize не принял манифест за документ
+PREPARE_MANIFEST_FILE_NAME = ".prepare_manifest"
+
+
+class PrepareManifest:
+    """
+    Манифест частей LLM-сегментации в каталоге результатов, перезаписывается после каждого изменения.
+    Отпечаток учитывает модель, промпт и тексты всех частей, поэтому состояние восстанавливается
+    только для того же входного файла с теми же параметрами деления.
+    """
+
+    __path: Path
+    __fingerprint: str
+    __parts: list[PreparePartState]
+    __lock: Lock
+
+    def __init__(
+        self, directory: Path, parts: list[TextPart], model: str, system_prompt: str
+    ) -> None:
+        self.__path = directory / PREPARE_MANIFEST_FILE_NAME
+        self.__parts = [
+            {
+                "hash": _sha256(part.text),
+                "pages": part.pages,
+                "status": "pending",
+                "attempts": 0,
+                "error": None,
+                "documents": [],
+            }
+            for part in parts
+        ]
+        self.__fingerprint = _sha256(
+            json.dumps([model, system_prompt, [part["hash"] for part in self.__parts]])
+        )
+        self.__lock = Lock()
+
+    @property
+    def parts(self) -> list[PreparePartState]:
+        return self.__parts
+
+    async def restore(self) -> bool:
+        """Переносит состояние из сохранённого манифеста, если он получен для того же входа"""
+
+        if not self.__path.is_file():
+            return False
+
+        try:
+            data = cast(PrepareManifestData, await load_json_from_file(self.__path))
+        except ValueError:
+            # Манифест мог остаться недописанным при аварийном завершении
+            return False
+
+        if data.get("fingerprint") != self.__fingerprint:
+            return False
+
+        self.__parts = data["parts"]
+        return True
+
+    async def update(self, index: int, state: PreparePartState) -> None:
+        async with self.__lock:
+            self.__parts[index] = state
+            await self.__write()
+
+    async def save(self) -> None:
+        async with self.__lock:
+            await self.__write()
+
+    async def __write(self) -> None:
+        data: PrepareManifestData = {
+            "fingerprint": self.__fingerprint,
+            "parts": self.__parts,
+        }
+        await save_json_to_file(self.__path, data)  # type: ignore[arg-type]
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,99 @@
+import json
+import sys
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.common.dependency_injection.injectable import injectable
+from src.kdctl.types.progress import ProgressEvent, ProgressEventName
+from src.kdctl.utils.tokens import count_tokens
+
+type ProgressSink = Callable[[ProgressEvent], None]
+
+
+def _write_to_stdout(event: ProgressEvent) -> None:
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+class CommandProgress:
+    """
+    Счётчики одного выполнения команды, каждое изменение отправляется в приёмник событием.
+    Токены считаются только для команд, работающих с моделью (model задан).
+    """
+
+    def __init__(
+        self, command: str, sink: ProgressSink, model: str | None, total: int | None
+    ) -> None:
+        self.__command = command
+        self.__sink = sink
+        self.__model = model
+        self.__total = total
+        self.__documents = 0
+        self.__bytes = 0
+        self.__tokens = 0
+        self.__errors = 0
+        self.__emit("started")
+
+    def set_total(self, total: int) -> None:
+        self.__total = total
+        self.__emit("progress")
+
+    def document_done(self, content: str) -> None:
+        self.__documents += 1
+        self.__bytes += len(content.encode())
+        if self.__model is not None:
+            self.__tokens += count_tokens(content, self.__model)
+        self.__emit("progress")
+
+    def note(self, message: str) -> None:
+        self.__emit("progress", message)
+
+    def error(self, message: str) -> None:
+        self.__errors += 1
+        self.__emit("error", message)
+
+    def finish(self) -> None:
+        self.__emit("finished")
+
+    def __emit(self, event: ProgressEventName, message: str | None = None) -> None:
+        progress_event: ProgressEvent = {
+            "event": event,
+            "command": self.__command,
+            "documents": self.__documents,
+            "total": self.__total,
+            "bytes": self.__bytes,
+            "tokens": self.__tokens,
+            "errors": self.__errors,
+        }
+        if message is not None:
+            progress_event["message"] = message
+
+        self.__sink(progress_event)
+
+
+@injectable(container_tags=["KDCTL"])
+class ProgressReporter:
+    """
+    Машиночитаемые события прогресса команд.
+    По умолчанию события пишутся построчно в stdout как JSON (логи идут в stderr),
+    вызывающая сторона может подменить приёмник для текущего контекста выполнения.
+    """
+
+    def __init__(self) -> None:
+        self.__sink: ContextVar[ProgressSink] = ContextVar(
+            "progress_sink", default=_write_to_stdout
+        )
+
+    @contextmanager
+    def use_sink(self, sink: ProgressSink) -> Iterator[None]:
+        token = self.__sink.set(sink)
+        try:
+            yield
+        finally:
+            self.__sink.reset(token)
+
+    def start(
+        self, command: str, *, model: str | None = None, total: int | None = None
+    ) -> CommandProgress:
+        return CommandProgress(command, self.__sink.get(), model, total)
@@ -0,0 +1,15 @@
+import hashlib
+import json
+
+from src.common.cache.sqlite_cache import SqliteCache
+
+
+class SegmentationCache(SqliteCache):
+    """Дисковый кэш результатов LLM-сегментации частей документа"""
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, text: str) -> str:
+        # Сериализация списком исключает совпадение ключей при разных границах между полями
+        return hashlib.sha256(
+            json.dumps([model, system_prompt, text], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
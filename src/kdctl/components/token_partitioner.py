@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+
+from src.common.dependency_injection.injectable import injectable
+from src.common.logger.logger_mixin import LoggerMixin
+from src.kdctl.types.page_index import PageSpan
+from src.kdctl.utils.markdown import HEADING_PATTERN, update_fence
+from src.kdctl.utils.tokens import count_tokens
+
+# Набрав эту долю бюджета, часть закрывается перед ближайшим заголовком, а не на произвольном абзаце
+_HEADING_CUT_RATIO = 0.5
+
+
+@dataclass
+class TextPart:
+    text: str
+    pages: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Block:
+    text: str
+    tokens: int
+    is_heading: bool
+
+
+@injectable(container_tags=["KDCTL"])
+class TokenPartitioner(LoggerMixin):
+    """
+    Делит текст на части не больше max_tokens токенов (tiktoken) только по границам заголовков и абзацев,
+    блоки кода не разрываются. С индексом страниц части собираются из целых страниц,
+    а страница больше бюджета делится отдельно и помечается только своим ключом.
+    Блок больше бюджета (например, огромный пример кода) делится по строкам.
+    """
+
+    def partition(
+        self,
+        text: str,
+        pages: list[PageSpan] | None,
+        *,
+        max_tokens: int,
+        model: str | None = None,
+        merge_pages: bool = True,
+    ) -> list[TextPart]:
+        if not pages:
+            return [
+                TextPart(text=part)
+                for part in self.__pack(self.__blocks(text, model), max_tokens, model)
+            ]
+
+        parts: list[TextPart] = []
+        current: list[PageSpan] = []
+        current_tokens = 0
+
+        def flush() -> None:
+            nonlocal current_tokens
+            if current:
+                parts.append(
+                    TextPart(
+                        text=text[current[0]["start"] : current[-1]["end"]],
+                        pages=[page["key"] for page in current],
+                    )
+                )
+                current.clear()
+                current_tokens = 0
+
+        for page in pages:
+            blocks = self.__blocks(text[page["start"] : page["end"]], model)
+            tokens = sum(block.tokens for block in blocks)
+
+            if tokens > max_tokens:
+                flush()
+                parts.extend(
+                    TextPart(text=part, pages=[page["key"]])
+                    for part in self.__pack(blocks, max_tokens, model)
+                )
+                continue
+
+            if current and (not merge_pages or current_tokens + tokens > max_tokens):
+                flush()
+
+            current.append(page)
+            current_tokens += tokens
+
+        flush()
+
+        return parts
+
+    # noinspection PyMethodMayBeStatic
+    def __blocks(self, text: str, model: str | None) -> list[_Block]:
+        """Абзацы и заголовки вне блоков кода, склеенные блоки дают исходный текст без изменений"""
+
+        blocks: list[list[str]] = []
+        in_fence: str | None = None
+        previous_blank = True
+
+        for line in text.splitlines(keepends=True):
+            is_blank = not line.strip()
+            starts_block = in_fence is None and (
+                HEADING_PATTERN.match(line) is not None or (previous_blank and not is_blank)
+            )
+
+            if starts_block or not blocks:
+                blocks.append([])
+
+            blocks[-1].append(line)
+            in_fence = update_fence(in_fence, line)
+            previous_blank = is_blank
+
+        return [
+            _Block(
+                text=(block_text := "".join(lines)),
+                tokens=count_tokens(block_text, model),
+                is_heading=HEADING_PATTERN.match(lines[0]) is not None,
+            )
+            for lines in blocks
+        ]
+
+    def __pack(self, blocks: list[_Block], max_tokens: int, model: str | None) -> list[str]:
+        parts: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        def flush() -> None:
+            nonlocal current_tokens
+            if current:
+                parts.append("".join(current))
+                current.clear()
+                current_tokens = 0
+
+        for block in blocks:
+            if block.tokens > max_tokens:
+                flush()
+                self._logger.warning(
+                    f"Block of {block.tokens} tokens exceeds part budget {max_tokens}, splitting by lines"
+                )
+                parts.extend(self.__split_lines(block.text, max_tokens, model))
+                continue
+
+            if current and (
+                current_tokens + block.tokens > max_tokens
+                or (block.is_heading and current_tokens >= max_tokens * _HEADING_CUT_RATIO)
+            ):
+                flush()
+
+            current.append(block.text)
+            current_tokens += block.tokens
+
+        flush()
+
+        return parts
+
+    # noinspection PyMethodMayBeStatic
+    def __split_lines(self, text: str, max_tokens: int, model: str | None) -> list[str]:
+        parts: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        for line in text.splitlines(keepends=True):
+            tokens = count_tokens(line, model)
+            if current and current_tokens + tokens > max_tokens:
+                parts.append("".join(current))
+                current = []
+                current_tokens = 0
+
+            current.append(line)
+            current_tokens += tokens
+
+        if current:
+            parts.append("".join(current))
+
+        return parts
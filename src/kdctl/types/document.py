@@ -12,3 +12,9 @@ class Document(TypedDict):
     id: str
     payload: DocumentPayload
     vector: Vector | None
+
+
+class VectorShardRow(TypedDict):
+    id: str
+    name: str
+    payload: DocumentPayload
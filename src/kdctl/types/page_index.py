@@ -0,0 +1,9 @@
+from typing import TypedDict
+
+
+class PageSpan(TypedDict):
+    """Страница внутри объединённого документа: ключ и границы в символах"""
+
+    key: str
+    start: int
+    end: int
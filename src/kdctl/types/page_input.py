@@ -0,0 +1,9 @@
+from typing import Any, TypedDict
+
+
+class PageInput(TypedDict):
+    """Страница для подготовки по отдельности: ключ, файл с содержимым и метаданные из Registry"""
+
+    key: str
+    path: str
+    metadata: dict[str, Any]
@@ -0,0 +1,19 @@
+from typing import Literal, TypedDict
+
+type PreparePartStatus = Literal["pending", "done", "failed"]
+
+
+class PreparePartState(TypedDict):
+    """Состояние части LLM-сегментации: хэш текста, исходные страницы, попытки и созданные документы"""
+
+    hash: str
+    pages: list[str]
+    status: PreparePartStatus
+    attempts: int
+    error: str | None
+    documents: list[str]
+
+
+class PrepareManifestData(TypedDict):
+    fingerprint: str
+    parts: list[PreparePartState]
@@ -0,0 +1,16 @@
+from typing import Literal, NotRequired, TypedDict
+
+type ProgressEventName = Literal["started", "progress", "error", "finished"]
+
+
+class ProgressEvent(TypedDict):
+    """Событие прогресса команды kdctl, счётчики накопительные с начала выполнения команды"""
+
+    event: ProgressEventName
+    command: str
+    documents: int
+    total: int | None
+    bytes: int
+    tokens: int
+    errors: int
+    message: NotRequired[str]
@@ -0,0 +1,14 @@
+from typing import TypedDict
+
+
+class RegistryFixtureResponse(TypedDict):
+    file: str
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+
+
+class RegistryFixtureIndex(TypedDict):
+    base_url: str
+    recorded_at: str
+    responses: dict[str, RegistryFixtureResponse]
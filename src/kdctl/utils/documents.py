@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from src.common.utils.fs_utils import save_json_to_file
+from src.kdctl.types.document import Document
+
+# Маркер завершения documents-prepare в каталоге результатов, после него новых документов не будет
+PREPARE_COMPLETE_MARKER_FILE_NAME = ".prepare_complete"
+
+
+def list_document_files(directory: Path) -> list[Path]:
+    """JSON-документы каталога, скрытые служебные и временные файлы пропускаются"""
+
+    return [
+        file
+        for file in directory.iterdir()
+        if file.is_file() and file.suffix == ".json" and not file.name.startswith(".")
+    ]
+
+
+async def save_document_atomically(path: Path, document: Document) -> None:
+    """Запись через скрытый временный файл: читающий каталог параллельно не увидит недописанный документ"""
+
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    await save_json_to_file(temporary_path, document)  # type: ignore[arg-type]
+    temporary_path.replace(path)
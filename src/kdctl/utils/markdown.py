@@ -0,0 +1,26 @@
+import re
+
+HEADING_PATTERN = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE_PATTERN = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+
+def update_fence(in_fence: str | None, line: str) -> str | None:
+    """Возвращает открывающую последовательность блока кода, внутри которого оказываемся после строки, или None"""
+
+    match = _FENCE_PATTERN.match(line)
+    if match is None:
+        return in_fence
+
+    marker = match.group(1)
+    if in_fence is None:
+        return marker
+
+    # Блок закрывается той же последовательностью символов не короче открывающей
+    if (
+        marker[0] == in_fence[0]
+        and len(marker) >= len(in_fence)
+        and not line.strip()[len(marker) :].strip()
+    ):
+        return None
+
+    return in_fence
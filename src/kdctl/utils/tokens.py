@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+import tiktoken
+
+_DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache
+def get_encoding(model: str | None = None) -> tiktoken.Encoding:
+    if model is not None:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+
+    return tiktoken.get_encoding(_DEFAULT_ENCODING)
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    return len(get_encoding(model).encode(text, disallowed_special=()))
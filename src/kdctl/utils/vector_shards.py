@@ -0,0 +1,102 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Literal, cast
+
+import numpy as np
+
+from src.kdctl.types.document import Document, Vector, VectorShardRow
+
+type VectorDtype = Literal["float32", "float16"]
+
+VECTORS_FILE_SUFFIX = ".npy"
+PAYLOADS_FILE_SUFFIX = ".jsonl"
+
+
+def list_vector_shards(directory: Path) -> list[Path]:
+    """
+    Файлы векторов шардов каталога. Шард — матрица векторов в .npy и одноимённый .jsonl с payload,
+    i-я строка которого описывает i-й вектор; скрытые временные файлы и шарды без payload пропускаются.
+    """
+
+    return sorted(
+        file
+        for file in directory.iterdir()
+        if file.is_file()
+        and file.suffix == VECTORS_FILE_SUFFIX
+        and not file.name.startswith(".")
+        and payloads_path(file).is_file()
+    )
+
+
+def payloads_path(vectors_path: Path) -> Path:
+    return vectors_path.with_suffix(PAYLOADS_FILE_SUFFIX)
+
+
+def to_vector_matrix(vectors: list[Vector], dtype: VectorDtype) -> np.ndarray:
+    return np.asarray(vectors, dtype=dtype)
+
+
+def shard_row_to_document(row: VectorShardRow, vector: np.ndarray) -> Document:
+    return {"id": row["id"], "payload": row["payload"], "vector": vector.tolist()}
+
+
+def save_vector_shard_sync(
+    vectors_path: Path, rows: list[VectorShardRow], vectors: np.ndarray
+) -> None:
+    if len(rows) != len(vectors):
+        raise ValueError(f"Got {len(rows)} payloads for {len(vectors)} vectors")
+
+    # Payload записывается первым: list_vector_shards видит шард только после появления файла векторов
+    target_payloads_path = payloads_path(vectors_path)
+    temporary_payloads_path = target_payloads_path.with_name(f".{target_payloads_path.name}.tmp")
+    with open(temporary_payloads_path, "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(row) + "\n" for row in rows)
+    temporary_payloads_path.replace(target_payloads_path)
+
+    temporary_vectors_path = vectors_path.with_name(f".{vectors_path.name}.tmp")
+    with open(temporary_vectors_path, "wb") as file:
+        np.save(file, vectors)
+    temporary_vectors_path.replace(vectors_path)
+
+
+def load_vector_shard_rows_sync(vectors_path: Path) -> list[VectorShardRow]:
+    with open(payloads_path(vectors_path), "r", encoding="utf-8") as file:
+        return [cast(VectorShardRow, json.loads(line)) for line in file if line.strip()]
+
+
+def load_vector_shard_sync(
+    vectors_path: Path, *, mmap: bool = True
+) -> tuple[list[VectorShardRow], np.ndarray]:
+    """Векторы по умолчанию отображаются в память и читаются с диска по мере обращения к строкам"""
+
+    rows = load_vector_shard_rows_sync(vectors_path)
+    vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+
+    if vectors.ndim != 2 or len(vectors) != len(rows):
+        raise ValueError(
+            f"Vector shard '{vectors_path}' has {vectors.shape} vectors for {len(rows)} payloads"
+        )
+
+    return rows, vectors
+
+
+def remove_vector_shard_sync(vectors_path: Path) -> None:
+    vectors_path.unlink(missing_ok=True)
+    payloads_path(vectors_path).unlink(missing_ok=True)
+
+
+async def save_vector_shard(
+    vectors_path: Path, rows: list[VectorShardRow], vectors: np.ndarray
+) -> None:
+    await asyncio.to_thread(save_vector_shard_sync, vectors_path, rows, vectors)
+
+
+async def load_vector_shard_rows(vectors_path: Path) -> list[VectorShardRow]:
+    return await asyncio.to_thread(load_vector_shard_rows_sync, vectors_path)
+
+
+async def load_vector_shard(
+    vectors_path: Path, *, mmap: bool = True
+) -> tuple[list[VectorShardRow], np.ndarray]:
+    return await asyncio.to_thread(load_vector_shard_sync, vectors_path, mmap=mmap)
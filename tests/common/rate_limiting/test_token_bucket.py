@@ -0,0 +1,67 @@
+import pytest
+
+from src.common.rate_limiting import token_bucket
+from src.common.rate_limiting.token_bucket import TokenBucket
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _FakeClock:
+    clock = _FakeClock()
+    monkeypatch.setattr(token_bucket.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(token_bucket, "sleep", clock.sleep)
+    return clock
+
+
+async def test_burst_up_to_capacity_then_waits_for_refill(clock: _FakeClock) -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    for _ in range(5):
+        assert await bucket.acquire() == 0.0
+
+    assert await bucket.acquire() == pytest.approx(0.1)
+
+
+async def test_acquire_waits_until_pause_ends(clock: _FakeClock) -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    bucket.pause(2.0)
+
+    # Пауза плюс время на пополнение одного токена после неё
+    assert await bucket.acquire() == pytest.approx(2.1)
+
+
+async def test_pause_does_not_refill_burst(clock: _FakeClock) -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(2.0)
+    clock.now += 2.0
+
+    waited = [await bucket.acquire() for _ in range(3)]
+
+    assert waited == [pytest.approx(0.1)] * 3
+
+
+async def test_refill_after_pause_is_capped_by_capacity(clock: _FakeClock) -> None:
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(2.0)
+    clock.now += 12.0
+
+    for _ in range(5):
+        assert await bucket.acquire() == 0.0
+
+    assert await bucket.acquire() == pytest.approx(0.1)
+
+
+def test_rejects_non_positive_rate() -> None:
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)